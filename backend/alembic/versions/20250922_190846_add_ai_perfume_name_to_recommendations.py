@@ -1,8 +1,8 @@
 """add_ai_perfume_name_to_recommendations
 
-Revision ID: $(date +%Y%m%d_%H%M%S)_add_ai_perfume_name
+Revision ID: 20250922_190846_add_ai_perfume_name
 Revises: c5b23461c31d
-Create Date: $(date)
+Create Date: 2025-09-22 19:08:46
 
 """
 from alembic import op
@@ -10,7 +10,7 @@ import sqlalchemy as sa
 
 
 # revision identifiers, used by Alembic.
-revision = '$(date +%Y%m%d_%H%M%S)_add_ai_perfume_name'
+revision = '20250922_190846_add_ai_perfume_name'
 down_revision = 'c5b23461c31d'
 branch_labels = None
 depends_on = None
@@ -0,0 +1,45 @@
+"""add created_at keyset indexes
+
+Revision ID: b3f1c2d4e5a6
+Revises: a1b7aba5a6be, 01093ec50de1, 20250922_190846_add_ai_perfume_name
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c2d4e5a6'
+# also merges the heads left by the earlier branches
+down_revision: Union[str, Sequence[str], None] = (
+    'a1b7aba5a6be',
+    '01093ec50de1',
+    '20250922_190846_add_ai_perfume_name',
+)
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# tables listed newest first by (created_at, id)
+PAGINATED_TABLES = (
+    'users',
+    'perfumes',
+    'recommendations',
+    'auth_tokens',
+    'logs',
+    'questionnaire_reponses',
+)
+
+
+def upgrade() -> None:
+    for table in PAGINATED_TABLES:
+        op.create_index(
+            f'ix_{table}_created_at_id', table, ['created_at', 'id'], if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    for table in PAGINATED_TABLES:
+        op.drop_index(f'ix_{table}_created_at_id', table_name=table, if_exists=True)
@@ -0,0 +1,53 @@
+"""add recommendation history indexes
+
+Revision ID: c7d2e8f1a3b9
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e8f1a3b9'
+down_revision: Union[str, None] = 'b3f1c2d4e5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+AI_ROWS = sa.text('ai_perfume_name IS NOT NULL')
+
+
+def upgrade() -> None:
+    # get_user_recommendations: user_id = ? ORDER BY created_at DESC
+    op.create_index(
+        'ix_recommendations_user_id_created_at',
+        'recommendations',
+        ['user_id', 'created_at'],
+        if_not_exists=True,
+    )
+    # create_ai_recommendation dedup: user_id = ? AND ai_perfume_name = ? AND created_at > today
+    op.create_index(
+        'ix_recommendations_user_id_ai_perfume_name_created_at',
+        'recommendations',
+        ['user_id', 'ai_perfume_name', 'created_at'],
+        if_not_exists=True,
+    )
+    # get_latest_ai_recommendation, partial where the dialect supports it
+    op.create_index(
+        'ix_recommendations_ai_user_id_created_at',
+        'recommendations',
+        ['user_id', 'created_at'],
+        postgresql_where=AI_ROWS,
+        sqlite_where=AI_ROWS,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recommendations_ai_user_id_created_at', table_name='recommendations', if_exists=True)
+    op.drop_index('ix_recommendations_user_id_ai_perfume_name_created_at', table_name='recommendations', if_exists=True)
+    op.drop_index('ix_recommendations_user_id_created_at', table_name='recommendations', if_exists=True)
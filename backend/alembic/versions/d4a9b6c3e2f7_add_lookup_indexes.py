@@ -0,0 +1,59 @@
+"""add lookup indexes and one profile per user
+
+Revision ID: d4a9b6c3e2f7
+Revises: c7d2e8f1a3b9
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9b6c3e2f7'
+down_revision: Union[str, None] = 'c7d2e8f1a3b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column); logs.created_at is covered by ix_logs_created_at_id
+LOOKUP_INDEXES = (
+    ('ix_users_email', 'users', 'email'),
+    ('ix_questionnaire_reponses_user_id', 'questionnaire_reponses', 'user_id'),
+    ('ix_questionnaire_reponses_question_id', 'questionnaire_reponses', 'question_id'),
+    ('ix_auth_tokens_user_id', 'auth_tokens', 'user_id'),
+    ('ix_logs_user_id', 'logs', 'user_id'),
+)
+
+
+def upgrade() -> None:
+    # the racy read-then-insert may have left duplicates, which profile to keep
+    # is the operator's call: stop before the constraint instead of deleting any
+    duplicates = op.get_bind().execute(
+        sa.text(
+            'SELECT user_id, COUNT(*) FROM user_profiles '
+            'GROUP BY user_id HAVING COUNT(*) > 1 ORDER BY user_id'
+        )
+    ).all()
+    if duplicates:
+        listed = ', '.join(f'{user_id} ({count} profiles)' for user_id, count in duplicates)
+        raise RuntimeError(
+            f'user_profiles has several rows for {len(duplicates)} users: {listed}. '
+            'Keep one profile per user_id and rerun the upgrade'
+        )
+
+    for name, table, column in LOOKUP_INDEXES:
+        op.create_index(name, table, [column], if_not_exists=True)
+
+    with op.batch_alter_table('user_profiles') as batch_op:
+        batch_op.create_unique_constraint('uq_user_profiles_user_id', ['user_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_profiles') as batch_op:
+        batch_op.drop_constraint('uq_user_profiles_user_id', type_='unique')
+
+    for name, table, _ in LOOKUP_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
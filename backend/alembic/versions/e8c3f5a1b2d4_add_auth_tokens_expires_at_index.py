@@ -0,0 +1,27 @@
+"""add auth_tokens expires_at index for the token reaper
+
+Revision ID: e8c3f5a1b2d4
+Revises: d4a9b6c3e2f7
+Create Date: 2026-10-18 15:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c3f5a1b2d4'
+down_revision: Union[str, None] = 'd4a9b6c3e2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_auth_tokens_expires_at', 'auth_tokens', ['expires_at'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_auth_tokens_expires_at', table_name='auth_tokens', if_exists=True)
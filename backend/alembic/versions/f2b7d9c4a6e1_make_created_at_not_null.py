@@ -0,0 +1,52 @@
+"""backfill created_at and make it NOT NULL on the paginated tables
+
+Revision ID: f2b7d9c4a6e1
+Revises: e8c3f5a1b2d4
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d9c4a6e1'
+down_revision: Union[str, None] = 'e8c3f5a1b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# tables listed newest first by (created_at, id), see b3f1c2d4e5a6
+PAGINATED_TABLES = (
+    'users',
+    'perfumes',
+    'recommendations',
+    'auth_tokens',
+    'logs',
+    'questionnaire_reponses',
+)
+
+# rows that never got a created_at keep sorting after every dated row
+BACKFILL_CREATED_AT = '1970-01-01 00:00:00'
+
+
+def upgrade() -> None:
+    for table in PAGINATED_TABLES:
+        op.execute(
+            sa.text(f'UPDATE {table} SET created_at = :created_at WHERE created_at IS NULL')
+            .bindparams(created_at=BACKFILL_CREATED_AT)
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                'created_at', existing_type=sa.DateTime(), nullable=False
+            )
+
+
+def downgrade() -> None:
+    for table in PAGINATED_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                'created_at', existing_type=sa.DateTime(), nullable=True
+            )
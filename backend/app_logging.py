@@ -0,0 +1,163 @@
+"""
+file name:  app logging
+description: structured, level gated logging for the app. Callers only put
+records on a queue (QueueHandler), a QueueListener thread formats and writes
+them, so a request never waits on stdout
+"""
+
+from datetime import datetime, timezone
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# json for log shippers, text for reading in a terminal
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# share of verbose payloads (prompts, profiles, LLM output) logged when DEBUG is on
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+# records waiting for the writer thread, newer records are dropped past this
+LOG_HANDLER_QUEUE_SIZE = int(os.getenv("LOG_HANDLER_QUEUE_SIZE", "10000"))
+
+APP_LOGGER = "app"
+
+# attributes every LogRecord has, anything else was passed through extra=
+RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def _extra(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in RECORD_FIELDS}
+
+
+def _plain(value):
+    """value as primitives only, containers through a json round trip"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        try:
+            return json.loads(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            pass
+    return str(value)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extra(record),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{key}={value}" for key, value in _extra(record).items())
+        if not fields:
+            return line
+        # on the message line, ahead of any traceback
+        first, newline, rest = line.partition("\n")
+        return f"{first} {fields}{newline}{rest}"
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops the record instead of blocking when the queue is full"""
+
+    dropped = 0
+    _exceptions = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Snapshot the record on the caller's thread: the base prepare() clears
+        exc_info without keeping the traceback, so render it into exc_text
+        first. The message, traceback and extra values are plain data by the
+        time the listener formats them, so nothing the caller mutates later
+        (or an ORM object lazy loading on another thread) reaches the output
+        and no frames are held while the record waits in the queue
+        """
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._exceptions.formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        for key, value in _extra(record).items():
+            setattr(record, key, _plain(value))
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+_lock = threading.Lock()
+_listener: logging.handlers.QueueListener | None = None
+
+
+def setup_logging() -> None:
+    """Attach the queue handler to the app logger, safe to call more than once"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        records = queue.Queue(maxsize=LOG_HANDLER_QUEUE_SIZE)
+        logger = logging.getLogger(APP_LOGGER)
+        logger.setLevel(LOG_LEVEL)
+        logger.handlers = [DroppingQueueHandler(records)]
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Write out everything still queued and stop the writer thread"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"{APP_LOGGER}.{name}")
+
+
+def sampled(logger: logging.Logger, level: int = logging.DEBUG) -> bool:
+    """
+    Whether to log a verbose payload: the level has to be enabled and the
+    call has to fall in LOG_PAYLOAD_SAMPLE_RATE. Check it before building
+    the payload so production pays nothing for it
+    """
+    return logger.isEnabledFor(level) and random.random() < LOG_PAYLOAD_SAMPLE_RATE
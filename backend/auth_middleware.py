@@ -3,9 +3,10 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional
+from service.auth_service import JWT_SECRET, TokenService
 
 # JWT Configuration
-SECRET_KEY = "your-secret-key-change-in-production"  # Change this in production
+SECRET_KEY = JWT_SECRET
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -23,8 +24,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
+        payload = TokenService.verify_token(credentials.credentials)
+        user_id: str = payload.get("sub", payload.get("user_id"))
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         return {"user_id": user_id, "token": credentials.credentials}
@@ -39,8 +40,9 @@ async def get_current_user(request: Request):
 
     try:
         token = auth_header.split(" ")[1]
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
+        # cached verification and revocation check, no db round-trip
+        payload = TokenService.verify_token(token)
+        user_id = payload.get("sub", payload.get("user_id"))
 
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token payload")
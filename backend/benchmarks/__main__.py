@@ -0,0 +1,144 @@
+"""
+Benchmark Runner
+Seeds a throwaway database with a synthetic catalog and users, then times the
+API hot paths and the scoring engine. Results are written as JSON so runs on
+different commits can be compared.
+Usage: python -m benchmarks --perfumes 10000 --users 1000 --output results.json
+       python -m benchmarks --compare baseline.json --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation and CRUD hot paths")
+    parser.add_argument("--perfumes", type=int, default=10000, help="Synthetic catalog size")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users with profiles")
+    parser.add_argument("--history", type=int, default=5, help="Seeded recommendations per user")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per benchmark")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed calls per benchmark")
+    parser.add_argument("--only", nargs="*", help="Benchmarks to run (default: all)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Stub LLM response time")
+    parser.add_argument("--db-url", help="Database to seed (default: a temporary SQLite file)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write results")
+    parser.add_argument("--compare", help="Previous results file to diff against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="p50/p99 slowdown that counts as a regression"
+    )
+    return parser.parse_args()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print the change of every metric against the baseline, returns the regressions"""
+    regressions = []
+    print(f"\n📊 Compared with {baseline.get('commit')} ({baseline.get('timestamp')})")
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            change = (current[metric] - previous[metric]) / max(previous[metric], 1e-9)
+            flag = "❌" if change > threshold else "✅"
+            print(f"   {flag} {name} {metric}: {previous[metric]} -> {current[metric]} ({change:+.1%})")
+            if change > threshold:
+                regressions.append(f"{name} {metric}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+
+    # configure the app before anything imports db.core / ai_service
+    if args.db_url:
+        os.environ["DB_URL"] = args.db_url
+    else:
+        workdir = tempfile.mkdtemp(prefix="benchmarks-")
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ.setdefault("AI_API_KEY", "benchmark")
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    os.environ["AI_LLM_REASON"] = "true"
+
+    from fastapi.testclient import TestClient
+    from db.core import Base, db_engine, get_session
+    from db.models import UserProfile
+    from benchmarks.harness import BENCHMARKS, BenchmarkContext, measure
+    from benchmarks.cases import StubLLM
+    from benchmarks.seed import seed
+    import service.ai_service as ai_service
+
+    ai_service.client = StubLLM(args.llm_latency_ms / 1000.0)
+
+    print(f"🌱 Seeding {args.perfumes} perfumes and {args.users} users into {os.environ['DB_URL']}")
+    Base.metadata.create_all(bind=db_engine)
+    user_ids = seed(args.perfumes, args.users, args.history, args.seed)
+
+    from main import app
+
+    names = args.only or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"❌ Unknown benchmarks: {', '.join(unknown)}")
+        sys.exit(1)
+
+    results = {}
+    with TestClient(app) as client, get_session() as session:
+        profiles = (
+            session.query(UserProfile).filter(UserProfile.user_id.in_(user_ids[:1000])).all()
+        )
+        context = BenchmarkContext(client, user_ids, profiles)
+        for name in names:
+            print(f"⏱️  {name}...")
+            op = BENCHMARKS[name](context)
+            results[name] = measure(op, context, args.iterations, args.warmup)
+            print(
+                f"   p50 {results[name]['p50_ms']} ms, p99 {results[name]['p99_ms']} ms,"
+                f" {results[name]['throughput_per_s']} ops/s"
+            )
+
+    output = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "perfumes": args.perfumes,
+            "users": args.users,
+            "history": args.history,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "llm_latency_ms": args.llm_latency_ms,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(output, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
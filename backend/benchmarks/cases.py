@@ -0,0 +1,77 @@
+"""Benchmarks for the API hot paths and the scoring engine"""
+
+from benchmarks.harness import benchmark, BenchmarkContext
+from service.perfume_feature_store import PerfumeFeatureStore
+from service.recommendation_cache import RecommendationCache
+from service.scoring_service import ScoringService
+from types import SimpleNamespace
+import asyncio
+import time
+
+
+class StubLLM:
+    """Stand-in for the Gemini client with a fixed response time"""
+
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self.agenerate_content)
+        )
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self.latency_seconds)
+        return SimpleNamespace(text="Benchmark reason from the stub LLM.")
+
+    async def agenerate_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency_seconds)
+        return SimpleNamespace(text="Benchmark reason from the stub LLM.")
+
+
+def _ok(response):
+    response.raise_for_status()
+    return response
+
+
+@benchmark("perfumes_list")
+def perfumes_list(context: BenchmarkContext):
+    return lambda: _ok(context.client.get("/perfumes/"))
+
+
+@benchmark("recommendations_my")
+def recommendations_my(context: BenchmarkContext):
+    return lambda: _ok(
+        context.client.get("/recommendations/my", params={"user_id": context.user_id()})
+    )
+
+
+@benchmark("ai_recommend")
+def ai_recommend(context: BenchmarkContext):
+    """Uncached POST /ai/: ranking, stub LLM reason and the recommendation insert"""
+
+    def op():
+        RecommendationCache.clear()
+        _ok(context.client.post("/ai/", json={"user_id": context.user_id(), "mood": "calm"}))
+
+    return op
+
+
+@benchmark("ai_recommend_cached")
+def ai_recommend_cached(context: BenchmarkContext):
+    """POST /ai/ served from the recommendation cache"""
+    return lambda: _ok(
+        context.client.post("/ai/", json={"user_id": context.user_ids[0], "mood": "calm"})
+    )
+
+
+@benchmark("scoring_rank")
+def scoring_rank(context: BenchmarkContext):
+    """ScoringService.rank for one profile, candidate pruning + scoring + top-k"""
+    return lambda: ScoringService.rank(context.profile())
+
+
+@benchmark("scoring_full_catalog")
+def scoring_full_catalog(context: BenchmarkContext):
+    """Score every perfume for one profile, no pruning"""
+    snapshot = PerfumeFeatureStore.snapshot()
+    return lambda: ScoringService.score(snapshot, context.profile())
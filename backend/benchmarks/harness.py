@@ -0,0 +1,62 @@
+"""
+Benchmark registry and timing loop.
+
+A benchmark is a function taking the shared BenchmarkContext and returning
+the zero-argument operation to time, register it with @benchmark("name").
+"""
+
+from typing import Callable
+import numpy as np
+import time
+
+
+BENCHMARKS: dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+class BenchmarkContext:
+    def __init__(self, client, user_ids: list[int], profiles: list):
+        self.client = client  # fastapi TestClient over the app
+        self.user_ids = user_ids
+        self.profiles = profiles
+        self.iteration = 0  # index of the current timed call, to vary inputs
+
+    def user_id(self) -> int:
+        return self.user_ids[self.iteration % len(self.user_ids)]
+
+    def profile(self):
+        return self.profiles[self.iteration % len(self.profiles)]
+
+
+def measure(op: Callable, context: BenchmarkContext, iterations: int, warmup: int) -> dict:
+    """Run op warmup + iterations times, latency percentiles in ms and ops per second"""
+    for i in range(warmup):
+        context.iteration = i
+        op()
+
+    latencies = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        context.iteration = warmup + i
+        start = time.perf_counter()
+        op()
+        latencies[i] = time.perf_counter() - start
+    elapsed = time.perf_counter() - started
+
+    latencies *= 1000.0
+    return {
+        "iterations": iterations,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p90_ms": round(float(np.percentile(latencies, 90)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "max_ms": round(float(latencies.max()), 3),
+        "throughput_per_s": round(iterations / elapsed, 2) if elapsed else None,
+    }
@@ -0,0 +1,138 @@
+"""
+Recommendation History Benchmark
+Times the history, latest-AI and same-day dedup queries as the recommendations
+table grows, with and without the composite indexes, to show that the indexed
+latency stays flat.
+Usage: python -m benchmarks.recommendation_history --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+
+HISTORY_INDEXES = (
+    "ix_recommendations_user_id_created_at",
+    "ix_recommendations_user_id_ai_perfume_name_created_at",
+    "ix_recommendations_ai_user_id_created_at",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark recommendation history queries")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="Table sizes to test"
+    )
+    parser.add_argument("--users", type=int, default=10000, help="Users the rows are spread over")
+    parser.add_argument("--iterations", type=int, default=300, help="Timed calls per query")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed calls per query")
+    parser.add_argument("--db-url", help="Database to use (default: a temporary SQLite file)")
+    parser.add_argument("--output", default="recommendation_history_results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.db_url:
+        os.environ["DB_URL"] = args.db_url
+    else:
+        workdir = tempfile.mkdtemp(prefix="benchmarks-")
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'history.db')}"
+
+    from sqlalchemy import text
+    from db.core import Base, db_engine, get_session
+    from db.models import Recommendation
+    from service.recommendation_service import RecommendationService
+    from benchmarks.harness import BenchmarkContext, measure
+    from benchmarks.seed import seed_users
+
+    Base.metadata.create_all(bind=db_engine)
+    rng = random.Random(42)
+    indexes = [
+        index for index in Recommendation.__table__.indexes if index.name in HISTORY_INDEXES
+    ]
+    # recommendations.user_id references users, which only SQLite does not enforce
+    with get_session() as session:
+        user_ids = seed_users(session, args.users)
+        session.commit()
+    context = BenchmarkContext(None, user_ids, [])
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def history():
+        RecommendationService.get_user_recommendations(context.user_id(), 10)
+
+    def latest_ai():
+        RecommendationService.get_latest_ai_recommendation(context.user_id())
+
+    def dedup():
+        with get_session() as session:
+            session.query(Recommendation).filter(
+                Recommendation.user_id == context.user_id(),
+                Recommendation.ai_perfume_name == "Benchmark pick 3",
+                Recommendation.created_at > today,
+            ).first()
+
+    queries = {"history": history, "latest_ai": latest_ai, "dedup": dedup}
+    results = []
+    rows = 0
+    start = datetime.now() - timedelta(days=365)
+    for size in sorted(args.sizes):
+        print(f"🌱 Growing recommendations to {size} rows")
+        with get_session() as session:
+            while rows < size:
+                batch = min(10000, size - rows)
+                session.bulk_insert_mappings(
+                    Recommendation,
+                    [
+                        {
+                            "user_id": rng.choice(user_ids),
+                            # a third are plain catalog recommendations
+                            "ai_perfume_name": (
+                                f"Benchmark pick {rng.randint(0, 9)}" if rng.random() < 0.66 else None
+                            ),
+                            "created_at": start + timedelta(seconds=rng.randint(0, 365 * 86400)),
+                        }
+                        for _ in range(batch)
+                    ],
+                )
+                rows += batch
+            session.commit()
+
+        for indexed in (False, True):
+            with db_engine.begin() as connection:
+                for index in indexes:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+                if indexed:
+                    for index in indexes:
+                        index.create(connection)
+                if db_engine.dialect.name == "sqlite":
+                    connection.execute(text("ANALYZE"))
+
+            for name, op in queries.items():
+                stats = measure(op, context, args.iterations, args.warmup)
+                results.append({"rows": size, "indexed": indexed, "query": name, **stats})
+                print(
+                    f"   {'indexed' if indexed else 'no index':>8} {name:>10}:"
+                    f" p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms"
+                )
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "dialect": db_engine.dialect.name,
+                "users": args.users,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Synthetic data for the benchmarks: a catalog derived from db/sample_data.py
+and users with randomised questionnaire profiles.
+"""
+
+from db.core import get_session
+from db.models import Perfume, Recommendation, User, UserProfile
+from db.sample_data import sample_perfumes
+import random
+
+
+SEED_CHUNK_SIZE = 5000
+
+FAMILIES = sorted({perfume["fragrance_family"] for perfume in sample_perfumes})
+NOTES = sorted(
+    {
+        note.strip()
+        for perfume in sample_perfumes
+        for tier in ("top_notes", "middle_notes", "base_notes")
+        for note in (perfume.get(tier) or "").split(",")
+        if note.strip()
+    }
+)
+
+PROFILE_CHOICES = {
+    "skin_type": ["Dry", "Balanced", "Oily"],
+    "skin_temperature": ["Cool", "Neutral", "Warm"],
+    "skin_hydration": ["Low", "Medium", "High"],
+    "primary_climate": ["Hot & Humid", "Hot & Dry", "Temperate", "Cold"],
+    "avg_temperature": ["<15", "15-25", "26-32", ">32"],
+    "avg_humidity": ["<30", "30-60", ">60"],
+    "typical_environment": ["Outdoor", "Indoor-still", "Indoor-AC", "Indoor-ventilated"],
+    "airflow": ["Still", "Normal", "Breezy"],
+    "preferred_intensity": ["Light", "Moderate", "Strong"],
+    "gender_presentation": ["Feminine", "Masculine", "Unisex"],
+    "projection_goal": ["Close", "Arms length", "Room-filling"],
+    "sillage_tolerance_hot": ["Low", "Medium", "High"],
+    "seasonal_focus": ["Summer", "Winter", "All-year"],
+    "self_anosmia_musks": ["Yes", "No", "Unsure"],
+    "sensitivity_sweetness": ["Low", "Medium", "High"],
+    "sensitivity_projection": ["Low", "Medium", "High"],
+    "preferred_concentration": ["EDT", "EDP", "Parfum"],
+    "spray_location": ["Skin only", "Clothes only", "Mix"],
+}
+
+
+def _chunks(rows: list[dict]):
+    for offset in range(0, len(rows), SEED_CHUNK_SIZE):
+        yield rows[offset : offset + SEED_CHUNK_SIZE]
+
+
+def synthetic_perfume(rng: random.Random, index: int) -> dict:
+    """Variant of a sample perfume with jittered price/longevity and shuffled notes"""
+    perfume = dict(rng.choice(sample_perfumes))
+    perfume["name"] = f"{perfume['name']} #{index}"
+    if perfume.get("price"):
+        perfume["price"] = round(perfume["price"] * rng.uniform(0.5, 2.0), 2)
+    perfume["longevity_hours"] = rng.randint(2, 14)
+    perfume["fragrance_family"] = rng.choice(FAMILIES)
+    for tier in ("top_notes", "middle_notes", "base_notes"):
+        perfume[tier] = ",".join(rng.sample(NOTES, rng.randint(2, 5)))
+    return perfume
+
+
+def synthetic_profile(rng: random.Random, user_id: int) -> dict:
+    profile = {field: rng.choice(values) for field, values in PROFILE_CHOICES.items()}
+    start = rng.randint(0, 12)
+    profile.update(
+        {
+            "user_id": user_id,
+            "preferred_families": ",".join(rng.sample(FAMILIES, 2)),
+            "disliked_families": rng.choice(FAMILIES),
+            "longevity_target": rng.randint(2, 12),
+            "budget_min": None,
+            "budget_max": rng.choice([None, 100.0, 200.0, 400.0]),
+            "allergies": rng.choice([None, None, "Lavender", "Citrus"]),
+            "headache_triggers": None,
+            "number_of_sprays": rng.randint(1, 6),
+            "time_window_start": start,
+            "time_window_end": start + rng.randint(2, 10),
+            "projection_weight": rng.choice([0.2, 1.0, 2.0]),
+        }
+    )
+    return profile
+
+
+def seed_users(session, users: int) -> list[int]:
+    """Insert bare users after the highest existing id, returns their ids"""
+    first_id = (session.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+    user_ids = list(range(first_id, first_id + users))
+    for chunk in _chunks(
+        [
+            {
+                "id": user_id,
+                "username": f"bench{user_id}",
+                "email": f"bench{user_id}@example.com",
+            }
+            for user_id in user_ids
+        ]
+    ):
+        session.bulk_insert_mappings(User, chunk)
+    return user_ids
+
+
+def seed(perfumes: int, users: int, recommendations_per_user: int = 5, seed: int = 42) -> list[int]:
+    """Insert the synthetic catalog, users, profiles and history; returns the user ids"""
+    rng = random.Random(seed)
+
+    with get_session() as session:
+        for chunk in _chunks([synthetic_perfume(rng, i) for i in range(perfumes)]):
+            session.bulk_insert_mappings(Perfume, chunk)
+        session.commit()
+
+        user_ids = seed_users(session, users)
+        for chunk in _chunks([synthetic_profile(rng, user_id) for user_id in user_ids]):
+            session.bulk_insert_mappings(UserProfile, chunk)
+        for chunk in _chunks(
+            [
+                {
+                    "user_id": user_id,
+                    "ai_perfume_name": f"Benchmark pick {n}",
+                    "reason": "seeded history",
+                    "utility_score": rng.random(),
+                }
+                for user_id in user_ids
+                for n in range(recommendations_per_user)
+            ]
+        ):
+            session.bulk_insert_mappings(Recommendation, chunk)
+        session.commit()
+
+    return user_ids
@@ -0,0 +1,147 @@
+"""
+file name:  db async core
+description: AsyncEngine / AsyncSession for the async routers and services,
+the sync engine in db.core stays for alembic and scripts
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
+import os
+from app_logging import get_logger
+
+from db.core import (
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    _apply_sqlite_pragmas,
+)
+
+
+logger = get_logger(__name__)
+
+
+# sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_url(url: str) -> str:
+    """DB_URL rewritten for an asyncio driver, ASYNC_DB_URL wins when set"""
+    if os.getenv("ASYNC_DB_URL"):
+        return os.environ["ASYNC_DB_URL"]
+    db_url = make_url(url)
+    driver = ASYNC_DRIVERS.get(db_url.get_backend_name())
+    if driver is None or db_url.drivername in ASYNC_DRIVERS.values():
+        return url
+    return db_url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    db_url = make_url(url)
+    in_memory = db_url.get_backend_name() == "sqlite" and db_url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+    if in_memory:
+        engine = create_async_engine(url)
+    else:
+        # aiosqlite would otherwise fall back to NullPool and reconnect per session
+        engine = create_async_engine(
+            url,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    if db_url.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+async_db_engine = build_async_engine(async_url(DB_PATH))
+
+# objects are read after commit while the response is serialized, there is no
+# implicit IO on an AsyncSession so they must not expire
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_db_engine, autoflush=False, expire_on_commit=False
+)
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """async counterpart of db.core.get_session"""
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.warning("Async session rollback because of exception: %s", e)
+            await session.rollback()
+            raise
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """async counterpart of db.core.get_db, commits once per request"""
+    async with AsyncSessionLocal(info={"request_scoped": True}) as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            logger.warning("Request session rollback because of exception: %s", e)
+            await session.rollback()
+            raise
+
+
+@asynccontextmanager
+async def use_async_session(
+    session: AsyncSession | None = None,
+) -> AsyncIterator[AsyncSession]:
+    """the request session when one is passed in, else a session of our own"""
+    if session is not None:
+        yield session
+    else:
+        async with get_async_session() as own_session:
+            yield own_session
+
+
+async def acommit_or_flush(session: AsyncSession) -> None:
+    """commit a session we own, a request session is committed by get_async_db"""
+    if session.info.get("request_scoped"):
+        await session.flush()
+        session.info["flushed"] = True
+    else:
+        await session.commit()
+
+
+async def release_connection(session: AsyncSession | None) -> None:
+    """
+    Hand a request session's connection back to the pool before a slow await
+    (LLM call). Only for sessions that have not written anything yet: the
+    objects read so far are detached so they stay usable, the next query
+    checks out a connection again
+    """
+    if session is None or not session.in_transaction():
+        return
+    if session.info.get("flushed") or session.new or session.dirty or session.deleted:
+        return
+    session.expunge_all()
+    await session.rollback()
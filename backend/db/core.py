@@ -5,23 +5,145 @@ author: Awet Thon
 date : 09-09-2025
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import QueuePool
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 from fastapi import Depends
 from contextlib import contextmanager
 from typing import Generator
+from app_logging import get_logger
 
 
 load_dotenv()
 
 
+logger = get_logger(__name__)
+
+
 DB_PATH = os.environ["DB_URL"]
 
+# pool settings, used for every dialect that pools connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# sqlite pragmas applied to every new connection
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # negative means KiB, so 64 MiB of page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+            "overflow_max": 0,
+        }
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            with self.stats_lock:
+                self.stats["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - start
+        with self.stats_lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+            self.stats["overflow_max"] = max(self.stats["overflow_max"], self.overflow())
+        return connection
+
+    def recreate(self):
+        # keep the subclass when the engine disposes and rebuilds the pool
+        pool = super().recreate()
+        pool.stats = self.stats
+        pool.stats_lock = self.stats_lock
+        return pool
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def build_engine(url: str) -> Engine:
+    """Engine for url with the pool / pragma settings above"""
+    db_url = make_url(url)
+    in_memory = db_url.get_backend_name() == "sqlite" and db_url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+    if in_memory:
+        # a single shared connection, pooling would give every thread its own empty db
+        engine = create_engine(url)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    if db_url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def pool_stats(engine: Engine) -> dict:
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": DB_MAX_OVERFLOW,
+                "timeout_seconds": DB_POOL_TIMEOUT,
+            }
+        )
+    if isinstance(pool, TimedQueuePool):
+        with pool.stats_lock:
+            checkouts = pool.stats["checkouts"]
+            stats.update(pool.stats)
+        stats["wait_seconds_avg"] = (
+            stats["wait_seconds_total"] / checkouts if checkouts else 0.0
+        )
+    return stats
+
 
-db_engine = create_engine(DB_PATH)
+db_engine = build_engine(DB_PATH)
 
 
 SessionLocal = sessionmaker(bind=db_engine, autoflush=False, autocommit=False)
@@ -39,7 +161,44 @@ def get_session() -> Generator[Session, None, None]:
         session = SessionLocal()
         yield session
     except Exception as e:
-        print("Session rollback because of exception:{}", e)
+        logger.warning("Session rollback because of exception: %s", e)
         raise
     finally:
         session.close()
+
+
+def get_db() -> Generator[Session, None, None]:
+    """
+    FastAPI dependency, one session and one transaction per request.
+    Services only flush into it, it commits once after the handler returns
+    or rolls back if the handler raised
+    """
+    # objects returned by the handler are serialized after the commit
+    session = SessionLocal(expire_on_commit=False, info={"request_scoped": True})
+    try:
+        yield session
+        session.commit()
+    except Exception as e:
+        logger.warning("Request session rollback because of exception: %s", e)
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+@contextmanager
+def use_session(session: Session | None = None) -> Generator[Session, None, None]:
+    """the request session when one is passed in, else a session of our own"""
+    if session is not None:
+        yield session
+    else:
+        with get_session() as own_session:
+            yield own_session
+
+
+def commit_or_flush(session: Session) -> None:
+    """commit a session we own, a request session is committed by get_db"""
+    if session.info.get("request_scoped"):
+        session.flush()
+    else:
+        session.commit()
@@ -8,6 +8,9 @@ from sqlalchemy import (
     Text,
     Boolean,
     JSON,  # Added JSON import for storing alternative recommendations
+    Index,
+    UniqueConstraint,
+    text,
 )
 
 
@@ -17,6 +20,8 @@ from datetime import datetime
 
 class User(Base):
     __tablename__ = "users"
+    # keyset pagination order, see service/pagination.py
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
     id = Column(Integer, primary_key=True)
 
     # personal info
@@ -29,14 +34,16 @@ class User(Base):
     country_of_residence = Column(String(100), nullable=True)
 
     username = Column(String(50), index=True)
-    email = Column(String(60), nullable=False)
+    email = Column(String(60), nullable=False, index=True)
     password = Column(String)
     role = Column(String, default="USER")
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
 
 
 class UserProfile(Base):
     __tablename__ = "user_profiles"
+    # one profile per user, enforced by the db instead of a read-then-insert
+    __table_args__ = (UniqueConstraint("user_id", name="uq_user_profiles_user_id"),)
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
@@ -184,13 +191,15 @@ class Questionnaire(Base):
 
 class QuestionnaireResponse(Base):
     __tablename__ = "questionnaire_reponses"
+    # keyset pagination order, see service/pagination.py
+    __table_args__ = (Index("ix_questionnaire_reponses_created_at_id", "created_at", "id"),)
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    question_id = Column(String(100), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    question_id = Column(String(100), nullable=False, index=True)
     answer_text = Column(Text, nullable=True)
     answer_number = Column(Float, nullable=True)
     answer_json = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     def __repr__(self):
         return f"<QuestionnaireResponse {self.id} for User {self.user_id}>"
@@ -209,6 +218,8 @@ class QuestionnaireResponse(Base):
 
 class Perfume(Base):
     __tablename__ = "perfumes"
+    # keyset pagination order, see service/pagination.py
+    __table_args__ = (Index("ix_perfumes_created_at_id", "created_at", "id"),)
     id = Column(Integer, primary_key=True)
     name = Column(String(200), nullable=False)
     brand = Column(String(100), nullable=False)
@@ -237,7 +248,7 @@ class Perfume(Base):
     allergens = Column(Text, nullable=True)
     image_url = Column(String(300), nullable=True)
 
-    created_at = Column(DateTime, nullable=True, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
 
     def __repr__(self):
         return f"<Perfume {self.brand} - {self.name}>"
@@ -266,6 +277,27 @@ class Perfume(Base):
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
+    __table_args__ = (
+        # keyset pagination order, see service/pagination.py
+        Index("ix_recommendations_created_at_id", "created_at", "id"),
+        # a user's history, newest first
+        Index("ix_recommendations_user_id_created_at", "user_id", "created_at"),
+        # same day duplicate check in create_ai_recommendation
+        Index(
+            "ix_recommendations_user_id_ai_perfume_name_created_at",
+            "user_id",
+            "ai_perfume_name",
+            "created_at",
+        ),
+        # latest AI recommendation, only AI rows are indexed
+        Index(
+            "ix_recommendations_ai_user_id_created_at",
+            "user_id",
+            "created_at",
+            postgresql_where=text("ai_perfume_name IS NOT NULL"),
+            sqlite_where=text("ai_perfume_name IS NOT NULL"),
+        ),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
@@ -302,7 +334,7 @@ class Recommendation(Base):
     user_notes = Column(Text, nullable=True)  # Free text feedback
     feedback_date = Column(DateTime, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
 
     def __repr__(self):
         return f"<Recommendation {self.id} for User {self.user_id}>"
@@ -345,24 +377,29 @@ class Recommendation(Base):
 
 class AuthToken(Base):
     __tablename__ = "auth_tokens"
+    # keyset pagination order, see service/pagination.py
+    __table_args__ = (Index("ix_auth_tokens_created_at_id", "created_at", "id"),)
     id = Column(Integer, primary_key=True, autoincrement=True)
     token = Column(String(250), unique=True, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     type = Column(String(50), default="access_token")
     is_deleted = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
     updated_at = Column(DateTime, nullable=True)
-    expires_at = Column(DateTime, nullable=True)
+    # the token reaper deletes by expires_at, see service/token_reaper.py
+    expires_at = Column(DateTime, nullable=True, index=True)
 
 
 class Log(Base):
     __tablename__ = "logs"
+    # keyset pagination order, see service/pagination.py
+    __table_args__ = (Index("ix_logs_created_at_id", "created_at", "id"),)
     id = Column(Integer, primary_key=True)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
     operation_type = Column(
         String, nullable=False
     )  # CREATE, READ, UPDATE, DELETE, LOGIN, LOGOUT
     description = Column(Text, nullable=True)
     url = Column(String, nullable=True)
-    user_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True, index=True)
     is_deleted = Column(Boolean, default=False)
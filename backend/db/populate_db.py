@@ -1,6 +1,7 @@
 from db.core import get_session
 from db.models import Perfume
 from db.sample_data import sample_perfumes
+from service.perfume_feature_store import PerfumeFeatureStore
 
 
 def insert_perfumes():
@@ -18,6 +19,9 @@ def insert_perfumes():
         session.add_all(perfumes)
         session.commit()
 
+    # catalog changed in bulk, rebuild the in-process feature arrays
+    PerfumeFeatureStore.build()
+
 
 if __name__ == "main":
     insert_perfumes()
@@ -1,7 +1,9 @@
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
 from db.core import Base, db_engine
+from db.async_core import async_db_engine
 from starlette.middleware.cors import CORSMiddleware
+from metrics_middleware import MetricsMiddleware, instrument_routes
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from typing import Union
@@ -17,11 +19,23 @@ from routers.recommendations_router import router as recommendation_router
 from routers.questionnaire_router import router as questionnaire_router
 from routers.auth_router import router as auth_router
 from routers.log_router import router as log_router
+from routers.export_router import router as export_router
+from routers.db_router import router as db_router
+from routers.metrics_router import router as metrics_router
 
 from routers.ai_router import router as ai_router
 
 
 from db.populate_db import insert_perfumes
+from service.perfume_feature_store import PerfumeFeatureStore
+from service.log_sink import LogSink
+from service.token_cache import RevokedTokens
+from service.token_reaper import TokenReaper
+from starlette.concurrency import run_in_threadpool
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
 
 
 class EntityException(Exception):
@@ -34,13 +48,21 @@ class EntityException(Exception):
 # create lifespan to init db
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("App is starting...")
+    logger.info("App is starting...")
     try:
         Base.metadata.create_all(bind=db_engine)
+        PerfumeFeatureStore.build()
+        await run_in_threadpool(RevokedTokens.load)
+        LogSink.start()
+        TokenReaper.start()
         yield
-        print("App is shutting down...")
+        logger.info("App is shutting down...")
     finally:
-        pass
+        await run_in_threadpool(TokenReaper.stop)
+        # write the log rows that are still queued
+        await run_in_threadpool(LogSink.stop)
+        # pooled async connections belong to this event loop
+        await async_db_engine.dispose()
 
 
 # init main app
@@ -103,6 +125,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# outside CORS but inside Starlette's ServerErrorMiddleware, which runs the
+# Exception handler: an unhandled error reaches this middleware as an
+# exception and is counted as a 500
+app.add_middleware(MetricsMiddleware)
+
 
 app.include_router(ai_router)
 app.include_router(perfume_router)
@@ -113,6 +140,9 @@ app.include_router(user_profile_router)
 app.include_router(recommendation_router)
 app.include_router(auth_router)
 app.include_router(log_router)
+app.include_router(export_router)
+app.include_router(db_router)
+app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -129,3 +159,7 @@ def read_home():
 def populate_db():
     insert_perfumes()
     return {"success": True, "message": "Populate Perfume Table"}
+
+
+# after the last route, so every endpoint is wrapped
+instrument_routes(app)
@@ -0,0 +1,119 @@
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from service.metrics import Metrics, request_timers, SIZE_BUCKETS
+import functools
+import inspect
+import time
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware, so streamed responses keep
+    streaming) recording per route latency, status codes, response sizes and
+    in-flight requests, plus the db / llm / serialization time of each request.
+
+    Routes are labelled with their path template, unmatched paths share one
+    label so random URLs cannot blow up the series count.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timers: dict = {}
+        token = request_timers.set(timers)
+        start = time.perf_counter()
+        response = {"status": 500, "bytes": 0}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                # the return value has been encoded once the response starts
+                if "endpoint_done" in timers:
+                    timers["serialization"] = time.perf_counter() - timers.pop("endpoint_done")
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        Metrics.add_gauge("http_requests_in_flight", "Requests being handled", 1)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            Metrics.add_gauge("http_requests_in_flight", "Requests being handled", -1)
+            request_timers.reset(token)
+            self.record(scope, response, timers, time.perf_counter() - start)
+
+    @staticmethod
+    def record(scope: Scope, response: dict, timers: dict, seconds: float) -> None:
+        route = scope.get("route")
+        labels = {
+            "method": scope["method"],
+            "route": route.path if route is not None else "unmatched",
+        }
+        Metrics.inc(
+            "http_requests_total",
+            "Requests by route and status code",
+            {**labels, "status": response["status"]},
+        )
+        Metrics.observe(
+            "http_request_duration_seconds", "Request latency", seconds, labels
+        )
+        Metrics.observe(
+            "http_response_size_bytes",
+            "Response body size",
+            response["bytes"],
+            labels,
+            buckets=SIZE_BUCKETS,
+        )
+        for phase in ("db", "llm", "serialization"):
+            if phase in timers:
+                Metrics.observe(
+                    "http_request_phase_seconds",
+                    "Time a request spent in the database, the LLM or encoding its response",
+                    timers[phase],
+                    {**labels, "phase": phase},
+                )
+
+
+def instrument_routes(app: FastAPI) -> None:
+    """
+    Mark when each endpoint returns so the middleware can tell encoding
+    time apart. Call after every router is included
+    """
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or getattr(route.dependant.call, "timed", False):
+            continue
+        route.dependant.call = _mark_endpoint_done(route.dependant.call)
+
+
+def _mark_endpoint_done(call):
+    def done():
+        timers = request_timers.get()
+        if timers is not None:
+            timers["endpoint_done"] = time.perf_counter()
+
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                done()
+
+    else:
+
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                done()
+
+    endpoint.timed = True
+    return endpoint
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Nightly Recommendation Precompute
+Ranks the catalog for many users and stores today's pick in bulk.
+Usage: python precompute_recommendations.py [--user-ids 1 2 3] [--chunk-size 500]
+"""
+
+import argparse
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from schema.batch_recommendation_schema import BatchRecommendationSchema
+from service.batch_recommendation_service import BatchRecommendationService
+from service.perfume_feature_store import PerfumeFeatureStore
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute today's recommendations")
+    parser.add_argument(
+        "--user-ids", type=int, nargs="*", help="Users to process (default: everyone with a profile)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=500, help="Users per query/insert")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Scoring processes (1 scores in this process, at most SCORING_WORKERS)"
+    )
+    parser.add_argument("--mood", help="Mood to recommend for")
+    parser.add_argument("--activity", help="Activity to recommend for")
+    parser.add_argument("--temperature", type=float, help="Temperature in °C")
+    parser.add_argument("--humidity", type=float, help="Relative humidity in %%")
+    parser.add_argument(
+        "--force", action="store_true", help="Also create a pick for users who already have one today"
+    )
+    args = parser.parse_args()
+
+    PerfumeFeatureStore.build()
+
+    result = BatchRecommendationService.precompute(
+        BatchRecommendationSchema(
+            user_ids=args.user_ids,
+            mood=args.mood,
+            activity=args.activity,
+            temperature=args.temperature,
+            humidity=args.humidity,
+            chunk_size=args.chunk_size,
+            skip_existing=not args.force,
+            workers=args.workers,
+        )
+    )
+
+    print(f"{'✅' if result.success else '❌'} {result.message}")
+    for field, value in (result.data[0] if result.data else {}).items():
+        print(f"   {field}: {value}")
+    if not result.success:
+        sys.exit(1)
@@ -1,10 +1,35 @@
-from service.ai_service import AIService
+from service.ai_service import AIService, cancel_on_disconnect
+from service.recommendation_cache import RecommendationCache
+from service.single_flight import SingleFlight
+from schema.response_schema import APIResponse
 from schema.ai_rec_payload_schema import AIRecPayloadSchema
-from fastapi import APIRouter
+from db.async_core import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Request
 
 router = APIRouter(prefix="/ai", tags=["AI API"])
 
 
 @router.post("/")
-def get_recommendation(payload: AIRecPayloadSchema):
-    return AIService.get_recommendation(payload)
+async def get_recommendation(
+    payload: AIRecPayloadSchema,
+    request: Request,
+    session: AsyncSession = Depends(get_async_db),
+):
+    return await cancel_on_disconnect(
+        request, AIService.aget_recommendation(payload, session)
+    )
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    return APIResponse(
+        success=True,
+        message="AI cache stats",
+        data=[
+            {
+                **RecommendationCache.get_stats(),
+                "single_flight": SingleFlight.get_stats(),
+            }
+        ],
+    )
@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from service.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from service.auth_service import AuthService
 from schema.login_schema import LoginSchema
 
@@ -6,8 +7,8 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/login")
-def login(user: LoginSchema):
-    return AuthService.login(user)
+async def login(user: LoginSchema):
+    return await AuthService.alogin(user)
 
 
 @router.get("/logout/{token_id}")
@@ -16,8 +17,21 @@ def logout(token_id: int):
 
 
 @router.get("/tokens")
-def get_tokens_all():
-    return AuthService.get_tokens_all()
+def get_tokens_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    return AuthService.get_tokens_all(cursor, limit)
+
+
+@router.get("/tokens/cache/stats")
+def get_token_cache_stats():
+    return AuthService.get_token_cache_stats()
+
+
+@router.get("/tokens/reaper/stats")
+def get_reaper_stats():
+    return AuthService.get_reaper_stats()
 
 
 @router.delete("/tokens/all")
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from db.core import db_engine, pool_stats
+from db.async_core import async_db_engine
+from schema.response_schema import APIResponse
+
+router = APIRouter(prefix="/db", tags=["Database"])
+
+
+@router.get("/pool")
+def get_pool_stats():
+    return APIResponse(
+        success=True,
+        message="Pool stats",
+        data=[
+            {"engine": "sync", **pool_stats(db_engine)},
+            {"engine": "async", **pool_stats(async_db_engine.sync_engine)},
+        ],
+    )
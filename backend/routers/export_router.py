@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from service.export_service import ExportService, EXPORT_FORMATS
+from db.models import Log, Recommendation, QuestionnaireResponse, UserProfile
+from datetime import datetime
+from typing import Literal
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+ExportFormat = Literal["ndjson", "csv"]
+
+
+def export_response(
+    model, name: str, export_format: str, start: datetime | None, end: datetime | None
+) -> StreamingResponse:
+    return StreamingResponse(
+        ExportService.stream(model, export_format, start, end),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{export_format}"'
+        },
+    )
+
+
+@router.get("/logs")
+def export_logs(
+    format: ExportFormat = "ndjson",
+    start: datetime | None = Query(None, description="created_at >= start"),
+    end: datetime | None = Query(None, description="created_at < end"),
+):
+    return export_response(Log, "logs", format, start, end)
+
+
+@router.get("/recommendations")
+def export_recommendations(
+    format: ExportFormat = "ndjson",
+    start: datetime | None = Query(None, description="created_at >= start"),
+    end: datetime | None = Query(None, description="created_at < end"),
+):
+    return export_response(Recommendation, "recommendations", format, start, end)
+
+
+@router.get("/questionnaire-responses")
+def export_questionnaire_responses(
+    format: ExportFormat = "ndjson",
+    start: datetime | None = Query(None, description="created_at >= start"),
+    end: datetime | None = Query(None, description="created_at < end"),
+):
+    return export_response(
+        QuestionnaireResponse, "questionnaire_responses", format, start, end
+    )
+
+
+@router.get("/user-profiles")
+def export_user_profiles(
+    format: ExportFormat = "ndjson",
+    start: datetime | None = Query(None, description="created_at >= start"),
+    end: datetime | None = Query(None, description="created_at < end"),
+):
+    return export_response(UserProfile, "user_profiles", format, start, end)
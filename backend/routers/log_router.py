@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from service.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from service.log_service import LogService
 from schema.log_schema import LogSchema
 
@@ -6,8 +7,16 @@ router = APIRouter(prefix="/logs", tags=["System Logs"])
 
 
 @router.get("/")
-def get_logs_all():
-    return LogService.get_logs_all()
+def get_logs_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    return LogService.get_logs_all(cursor, limit)
+
+
+@router.get("/sink/stats")
+def get_log_sink_stats():
+    return LogService.get_sink_stats()
 
 
 @router.get("/{log_id}")
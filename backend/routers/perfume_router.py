@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from service.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from service.perfume_service import PerfumeService
 from schema.perfume_schema import PerfumeSchema
 
@@ -6,25 +7,33 @@ router = APIRouter(prefix="/perfumes", tags=["Perfumes"])
 
 
 @router.get("/")
-def get_perfumes_all():
-    return PerfumeService.get_perfume_all()
+async def get_perfumes_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    return await PerfumeService.aget_perfume_all(cursor, limit)
 
 
 @router.post("/")
-def create_perfume(perfume: PerfumeSchema):
-    return PerfumeService.create_perfume(perfume)
+async def create_perfume(perfume: PerfumeSchema):
+    return await PerfumeService.acreate_perfume(perfume)
 
 
 @router.put("/{perfume_id}")
-def update_perfume(perfume_id: int, perfume: dict):
-    return PerfumeService.update_perfume(perfume_id, perfume)
+async def update_perfume(perfume_id: int, perfume: PerfumeSchema):
+    return await PerfumeService.aupdate_perfume(perfume_id, perfume)
 
 
 @router.delete("/{perfume_id}")
-def delete_perfume(perfume_id: int):
-    return PerfumeService.delete_perfume(perfume_id)
+async def delete_perfume(perfume_id: int):
+    return await PerfumeService.adelete_perfume(perfume_id)
 
 
 @router.get("/{perfume_id}")
-def get_perfume_by_id(perfume_id):
-    return PerfumeService.get_perfume_by_id(perfume_id)
+async def get_perfume_by_id(perfume_id: int):
+    return await PerfumeService.aget_perfume_by_id(perfume_id)
+
+
+@router.get("/{perfume_id}/similar")
+def get_similar_perfumes(perfume_id: int, limit: int = 5):
+    return PerfumeService.get_similar_perfumes(perfume_id, limit)
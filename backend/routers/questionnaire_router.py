@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, Response
 from service.questionnaire_service import QuestionnaireService
 from schema.questionnaire_schema import QuestionnaireSchema
 
@@ -7,8 +7,20 @@ router = APIRouter(prefix="/questionnaires/questions", tags=["Questionnaires"])
 
 
 @router.get("/")
-def get_questionnaires_all():
-    return QuestionnaireService.get_questionnaires_all()
+def get_questionnaires_all(if_none_match: str | None = Header(None)):
+    # served from the cached catalog, clients holding the current ETag get a 304
+    catalog, not_modified = QuestionnaireService.get_questionnaires_catalog(
+        if_none_match
+    )
+    headers = {"ETag": catalog["etag"], "Cache-Control": "no-cache"}
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(catalog["body"], media_type="application/json", headers=headers)
+
+
+@router.get("/catalog/stats")
+def get_catalog_stats():
+    return QuestionnaireService.get_catalog_stats()
 
 
 @router.get("/{q_id}")
@@ -1,13 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from service.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from service.questionnaire_response_service import QuestionnaireResponseService
-from schema.questionnaire_response_schema import QuestionnaireResponseSchema
+from schema.questionnaire_response_schema import (
+    QuestionnaireResponseSchema,
+    QuestionnaireBulkResponseSchema,
+)
 
 router = APIRouter(prefix="/questionnaires/responses", tags=["Questionnaire Responses"])
 
 
 @router.get("/")
-def get_questionnaire_responses_all():
-    return QuestionnaireResponseService.get_questionnaire_respones_all()
+def get_questionnaire_responses_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    return QuestionnaireResponseService.get_questionnaire_respones_all(cursor, limit)
 
 
 @router.get("/delete/all")
@@ -30,6 +37,15 @@ def create_questionnaire_response(questionnaire_response: QuestionnaireResponseS
     )
 
 
+# all answers of a questionnaire in one request
+@router.post("/bulk")
+def create_questionnaire_responses_bulk(bulk: QuestionnaireBulkResponseSchema):
+    result = QuestionnaireResponseService.create_questionnaire_responses_bulk(bulk)
+    if not result.success:
+        raise HTTPException(status_code=result.status_code, detail=result.message)
+    return result
+
+
 # update qn response
 
 
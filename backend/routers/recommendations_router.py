@@ -1,35 +1,56 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 
 from service.recommendation_service import RecommendationService
+from service.batch_recommendation_service import (
+    BatchRecommendationService,
+    MAX_HTTP_BATCH_USERS,
+)
 from schema.recommendation_schema import RecommendationSchema
+from schema.batch_recommendation_schema import BatchRecommendationSchema
+from service.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 
 router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
 
 
 @router.get("/")
-def get_recommendations_all():
-    return RecommendationService.get_recommendation_all()
+async def get_recommendations_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    return await RecommendationService.aget_recommendation_all(cursor, limit)
 
 
 @router.get("/my")
-def get_user_recommendations(
+async def get_user_recommendations(
     user_id: int = Query(..., description="User ID"),
     limit: int = Query(5, description="Number of recommendations to return")
 ):
-    return RecommendationService.get_user_recommendations(user_id, limit)
+    return await RecommendationService.aget_user_recommendations(user_id, limit)
 
 
 @router.get("/my/latest")
-def get_latest_ai_recommendation(
+async def get_latest_ai_recommendation(
     user_id: int = Query(..., description="User ID")
 ):
-    return RecommendationService.get_latest_ai_recommendation(user_id)
+    return await RecommendationService.aget_latest_ai_recommendation(user_id)
 
 
 @router.get("/{rec_id}")
-def get_recommendation_by_id(rec_id: int):
-    return RecommendationService.get_recommendation_by_id(rec_id)
+async def get_recommendation_by_id(rec_id: int):
+    return await RecommendationService.aget_recommendation_by_id(rec_id)
+
+
+@router.post("/batch")
+def create_batch_recommendations(payload: BatchRecommendationSchema):
+    # one request holds a worker thread until the batch is written
+    if payload.user_ids is None or len(set(payload.user_ids)) > MAX_HTTP_BATCH_USERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Send at most {MAX_HTTP_BATCH_USERS} user_ids, "
+            "run precompute_recommendations.py for everyone",
+        )
+    return BatchRecommendationService.precompute(payload)
 
 
 @router.post("/")
@@ -1,19 +1,27 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db.core import get_db
+from db.async_core import get_async_db
 
 from service.user_profile_service import UserProfileService
 from schema.user_profile_schema import UserProfileSchema, ProfilePayload
-from service.ai_service import AIService
+from service.ai_service import AIService, cancel_on_disconnect
 from schema.response_schema import APIResponse
 
 router = APIRouter(prefix="/profiles", tags=["User Profiles"])
 
 
 @router.post("/create/profile")
-def create_user_profile_ai(payload: ProfilePayload):
-    res = AIService.build_user_profile(payload)
+async def create_user_profile_ai(
+    payload: ProfilePayload,
+    request: Request,
+    session: AsyncSession = Depends(get_async_db),
+):
+    res = await cancel_on_disconnect(request, AIService.abuild_user_profile(payload))
     if res.success:
-        print("response ", res.data[0])
-        return UserProfileService.create_user_profile(dict(res.data[0]))
+        return await UserProfileService.acreate_user_profile(dict(res.data[0]), session)
     return APIResponse(success=False, message="Failed to create user profile")
 
 
@@ -23,14 +31,14 @@ def get_user_profiles_all():
 
 
 @router.get("/user/{user_id}")
-def get_user_profile_by_user_id(user_id: int):
-    return UserProfileService.get_user_profile_user_id(user_id)
+def get_user_profile_by_user_id(user_id: int, session: Session = Depends(get_db)):
+    return UserProfileService.get_user_profile_user_id(user_id, session)
 
 
 # create profile
 @router.post("/")
-def create_user_profile(profile: UserProfileSchema):
-    return UserProfileService.create_user_profile(profile)
+def create_user_profile(profile: UserProfileSchema, session: Session = Depends(get_db)):
+    return UserProfileService.create_user_profile(profile, session)
 
 
 # update profile
@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from service.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from service.user_service import UserService
 from schema.user_schema import UserSchema
 
@@ -7,28 +8,31 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 # ✅ Add routes WITHOUT trailing slashes to match frontend calls
 @router.get("")
-def get_users_all():
-    return UserService.get_all_users()
+async def get_users_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    return await UserService.aget_all_users(cursor, limit)
 
 
 @router.post("")
-def create_user(user: UserSchema):
-    return UserService.create_user(user)
+async def create_user(user: UserSchema):
+    return await UserService.acreate_user(user)
 
 
 @router.get("/{user_id}")
-def get_user_by_id(user_id: int):
-    return UserService.get_user_by_id(user_id)
+async def get_user_by_id(user_id: int):
+    return await UserService.aget_user_by_id(user_id)
 
 
 @router.put("/{user_id}")
-def update_user(user_id: int, user: UserSchema):
-    return UserService.update_user(user_id, user)
+async def update_user(user_id: int, user: UserSchema):
+    return await UserService.aupdate_user(user_id, user)
 
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int):
-    return UserService.delete_user(user_id)
+async def delete_user(user_id: int):
+    return await UserService.adelete_user(user_id)
 
 
 @router.delete("/d/all")
@@ -38,10 +42,13 @@ def delete_users_all():
 
 # Keep the trailing slash versions for compatibility
 @router.get("/")
-def get_users_all_with_slash():
-    return UserService.get_all_users()
+async def get_users_all_with_slash(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    return await UserService.aget_all_users(cursor, limit)
 
 
 @router.post("/")
-def create_user_with_slash(user: UserSchema):
-    return UserService.create_user(user)
+async def create_user_with_slash(user: UserSchema):
+    return await UserService.acreate_user(user)
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class BatchRecommendationSchema(BaseModel):
+    user_ids: list[int] | None = None  # every user with a profile when omitted
+    mood: str | None = None
+    activity: str | None = None
+    primary_climate: str | None = None
+    temperature: float | None = None
+    humidity: float | None = None
+    chunk_size: int = 500
+    skip_existing: bool = True  # keep a pick the user already got today
+    workers: int = 1  # score in the process pool when above 1, capped at SCORING_WORKERS
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class QuestionnaireResponseSchema(BaseModel):
@@ -7,3 +7,15 @@ class QuestionnaireResponseSchema(BaseModel):
     answer_text: str | None = None
     answer_number: float | None = None
     answer_json: str | None = None
+
+
+class QuestionnaireAnswerSchema(BaseModel):
+    question_id: str
+    answer_text: str | None = None
+    answer_number: float | None = None
+    answer_json: str | None = None
+
+
+class QuestionnaireBulkResponseSchema(BaseModel):
+    user_id: int
+    answers: list[QuestionnaireAnswerSchema] = Field(min_length=1, max_length=500)
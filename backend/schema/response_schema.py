@@ -9,9 +9,15 @@ class APIResponse:
         message: str = "",
         data: list = [],
     ):
+        # not part of the body (see __iter__), routers raising HTTPException read it
+        self.status_code = status_code
         self.success = success
         self.message = message
         self.data = data
 
     def to_dict(self):
         return {"success": self.success, "message": self.message, "data": self.data}
+
+    def __iter__(self):
+        # jsonable_encoder tries dict(obj) before vars(obj), keep the body to_dict()
+        return iter(self.to_dict().items())
@@ -3,13 +3,24 @@ from schema.ai_response_schema import AIResponseSchema
 from schema.ai_rec_payload_schema import AIRecPayloadSchema
 from service.recommendation_service import RecommendationService
 from service.user_profile_service import UserProfileService
+from service.scoring_service import ScoringService
+from service.recommendation_cache import RecommendationCache
+from service.single_flight import SingleFlight
+from service.metrics import Metrics
 from schema.response_schema import APIResponse
+from db.async_core import release_connection
+from db.models import UserProfile
+from sqlalchemy.ext.asyncio import AsyncSession
 from dotenv import load_dotenv
+from fastapi import Request
 from google import genai
 from google.genai import types
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
 import json
 import requests
+from app_logging import get_logger, sampled
 
 
 load_dotenv()
@@ -17,133 +28,360 @@ load_dotenv()
 
 API_KEY = os.environ["AI_API_KEY"]
 
+# when disabled the reason text is templated from the local scores, no LLM call at all
+LLM_REASON_ENABLED = os.getenv("AI_LLM_REASON", "true").lower() == "true"
 
-client = genai.Client(api_key=API_KEY)
+PROFILE_MISSING_MESSAGE = "Please complete your profile first to get personalized recommendations. Visit the questionnaire page to create your unique scent profile."
 
 
-class AIService:
-    @classmethod
-    def get_recommendation(cls, payload: AIRecPayloadSchema):
+# bound in-flight LLM calls so slow Gemini traffic cannot pile up without limit
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "30"))
 
-        res = UserProfileService.get_user_profile_user_id(payload.user_id)
+MODEL = "gemini-2.5-flash"
 
-        if not res.success:
-            return APIResponse(success=False, message="Please complete your profile first to get personalized recommendations. Visit the questionnaire page to create your unique scent profile.")
 
-        try:
-            user_profile = res.data[0].to_dict()
+logger = get_logger(__name__)
 
-            print("user profile", user_profile)
 
-            # Handle optional parameters with defaults
-            mood = payload.mood or "neutral"
-            activity = payload.activity or "general"
-            primary_climate = payload.primary_climate or user_profile.get("primary_climate", "moderate")
-            temperature = payload.temperature or 20  # Default room temperature
-            humidity = payload.humidity or 50  # Default moderate humidity
+client = genai.Client(api_key=API_KEY)
 
-            prompt = f"""
-                        Recommend perfume based on user unique profile, current mood, activity and current weather condition
-                        mood: {mood}
-                        activity: {activity}
-                        primary_climate: {primary_climate}
-                        temperature: {temperature}
-                        humidity: {humidity}
-                        user_profile: {user_profile}
+llm_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+
+
+async def cancel_on_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """
+    Await coro, cancelling it if the client goes away before it finishes
+    so abandoned requests stop holding an LLM slot
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.info("Client disconnected, cancelled AI request")
+                return APIResponse(success=False, message="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
 
-                        Please provide your response in the following JSON format:
 
-                        {{
-                          "perfume": "Name of the main recommended perfume",
-                          "reason": "Detailed explanation of why this perfume matches the user's profile",
-                          "other_perfumes_to_try": [
-                            {{
-                              "name": "Alternative perfume name 1",
-                              "image_url": "https://example.com/image1.jpg",
-                              "price": 85.50
-                            }},
-                            {{
-                              "name": "Alternative perfume name 2",
-                              "image_url": "https://example.com/image2.jpg",
-                              "price": 120.00
-                            }},
-                            {{
-                              "name": "Alternative perfume name 3",
-                              "image_url": "https://example.com/image3.jpg",
-                              "price": 95.25
-                            }}
-                          ],
-                          "predicted_longevity": 8.5,
-                          "predicted_projection": 7.2,
-                          "predicted_sillage": 6.8,
-                          "predicted_pleasantness": 8.9,
-                          "utility_score": 0.85,
-                          "image_url": "https://example.com/main-image.jpg",
-                          "price": 110.00,
-                          "context_mood": "{mood}",
-                          "context_activity": "{activity}",
-                          "context_temperature": {temperature},
-                          "context_humidity": {humidity}
-                        }}
+class AIService:
+    @classmethod
+    def flight_key(cls, payload: AIRecPayloadSchema) -> tuple:
+        """Identical concurrent requests share one LLM call and one DB write"""
+        return (
+            payload.user_id,
+            payload.mood,
+            payload.activity,
+            payload.primary_climate,
+            payload.temperature,
+            payload.humidity,
+        )
 
-                        Guidelines:
-                        - Provide 2-3 alternative perfumes in other_perfumes_to_try
-                        - Each alternative should have name, image_url, and price
-                        - Prices should be realistic for luxury perfumes (typically $50-$300)
-                        - Make sure alternatives are suitable for the user's profile
-                        - Focus on different perfume families or price ranges for variety
-                        """
+    @classmethod
+    async def aget_recommendation(
+        cls, payload: AIRecPayloadSchema, session: AsyncSession | None = None
+    ):
+        """
+        Recommendation for the user's profile, read through the caller's
+        session. Identical concurrent requests share one ranking / LLM / save
+        task.
+
+        Unlike the other endpoints this is two units of work, not one: the
+        shared task saves in a session of its own. It outlives whichever
+        request started it, so it cannot write through that request's
+        session, and saving once there (instead of once per caller) keeps
+        coalesced callers from racing the same day duplicate check
+        """
+        res = await UserProfileService.aget_user_profile_user_id(payload.user_id, session)
 
-            print("=================================================")
-            print("Prompt", prompt)
+        if not res.success:
+            return APIResponse(success=False, message=PROFILE_MISSING_MESSAGE)
 
-            print("Getting recommendation.............................")
+        # no pooled connection is held while scoring or waiting on the LLM
+        await release_connection(session)
 
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
-                config={
-                    "response_mime_type": "application/json",
-                    "response_schema": AIResponseSchema,
-                },
+        try:
+            response_data = await SingleFlight.run(
+                cls.flight_key(payload),
+                lambda: cls.acompute_and_save(payload, res.data[0]),
             )
 
-            response_data = json.loads(response.text)
-            print(response_data)
-
-            # Save the recommendation to database
-            save_result = RecommendationService.create_ai_recommendation(payload.user_id, response_data)
-            if not save_result.success:
-                print(f"Warning: Failed to save recommendation: {save_result.message}")
-
             return APIResponse(
                 success=True, message="Got recommendation", data=[response_data]
             )
+        except asyncio.TimeoutError:
+            return APIResponse(
+                success=False, status_code=504, message="AI service timed out"
+            )
         except Exception as e:
-            print("something went wrong", e)
+            logger.exception("Recommendation failed")
             return APIResponse(
                 success=False, status_code=500, message="Something went wrong on server"
             )
 
     @classmethod
-    def build_user_profile(cls, payload: ProfilePayload):
+    async def acompute_and_save(
+        cls, payload: AIRecPayloadSchema, profile: UserProfile
+    ) -> dict:
+        """acompute_recommendation, then store it in a short-lived session of its own"""
+        response_data = await cls.acompute_recommendation(payload, profile)
+        save_result = await RecommendationService.acreate_ai_recommendation(
+            payload.user_id, response_data
+        )
+        if not save_result.success:
+            logger.warning("Failed to save recommendation: %s", save_result.message)
+        return response_data
 
-        prompt = f"""
-        Use answers to the following questions to build user profile. 
-        questions:{payload.questions}
-        answer: {payload.answers}
+    @classmethod
+    async def acompute_recommendation(
+        cls, payload: AIRecPayloadSchema, profile: UserProfile
+    ) -> dict:
         """
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
+        Recommendation for an already loaded profile: scoring runs in the
+        threadpool, the LLM goes through the async client
+        """
+        user_profile = profile.to_dict()
+        if sampled(logger):
+            logger.debug("Recommendation profile", extra={"profile": user_profile})
+
+        context = cls.recommendation_context(payload, user_profile)
+
+        cache_key = RecommendationCache.key(user_profile, context)
+        response_data = await RecommendationCache.aget(cache_key)
+
+        if response_data is not None:
+            response_data.update(cls.context_fields(context))
+            return response_data
+
+        ranked = await run_in_threadpool(
+            ScoringService.rank, profile, cls.scoring_context(payload)
+        )
+
+        if ranked:
+            response_data = cls.ranked_response(ranked, context)
+            response_data["reason"] = await cls.aexplain_recommendation(
+                ranked[0], user_profile, context
+            )
+        else:
+            response_data = await cls.agenerate_recommendation(user_profile, context)
+        await RecommendationCache.aset(cache_key, response_data)
+        return response_data
+
+    @classmethod
+    async def agenerate_content(cls, **kwargs):
+        """Async Gemini call, bounded by the semaphore and the per call timeout"""
+        async with llm_semaphore:
+            # waiting for a slot is not counted as llm time
+            with Metrics.timer("llm"):
+                return await asyncio.wait_for(
+                    client.aio.models.generate_content(model=MODEL, **kwargs),
+                    timeout=LLM_TIMEOUT_SECONDS,
+                )
+
+    @classmethod
+    def recommendation_context(
+        cls, payload: AIRecPayloadSchema, user_profile: dict
+    ) -> dict:
+        # Handle optional parameters with defaults
+        return {
+            "mood": payload.mood or "neutral",
+            "activity": payload.activity or "general",
+            "primary_climate": payload.primary_climate
+            or user_profile.get("primary_climate", "moderate"),
+            "temperature": payload.temperature or 20,  # Default room temperature
+            "humidity": payload.humidity or 50,  # Default moderate humidity
+        }
+
+    @classmethod
+    def scoring_context(cls, payload: AIRecPayloadSchema) -> dict:
+        # only real readings override the profile's climate buckets
+        return {"temperature": payload.temperature, "humidity": payload.humidity}
+
+    @classmethod
+    def ranked_response(cls, ranked: list[dict], context: dict) -> dict:
+        """Recommendation payload (without reason) from the locally ranked perfumes"""
+        best, others = ranked[0], ranked[1:]
+        return {
+            "perfume": best["perfume"],
+            "perfume_id": best["perfume_id"],
+            "reason": None,
+            "other_perfumes_to_try": [
+                {
+                    "name": other["perfume"],
+                    "image_url": other["image_url"],
+                    "price": other["price"],
+                }
+                for other in others
+            ],
+            "predicted_longevity": best["predicted_longevity"],
+            "predicted_projection": best["predicted_projection"],
+            "predicted_sillage": best["predicted_sillage"],
+            "predicted_pleasantness": best["predicted_pleasantness"],
+            "utility_score": best["utility_score"],
+            "image_url": best["image_url"],
+            "price": best["price"],
+            **cls.context_fields(context),
+        }
+
+    @classmethod
+    def context_fields(cls, context: dict) -> dict:
+        return {
+            "context_mood": context["mood"],
+            "context_activity": context["activity"],
+            "context_temperature": context["temperature"],
+            "context_humidity": context["humidity"],
+        }
+
+    @classmethod
+    def template_reason(cls, best: dict) -> str:
+        return (
+            f"{best['perfume']} by {best['brand']} has the highest utility for your profile "
+            f"({best['utility_score']}). In your current conditions it is predicted to last"
+            f" about {best['predicted_longevity']:.1f} hours with a projection "
+            f"of {best['predicted_projection']:.1f}/10 and a pleasantness of "
+            f"{best['predicted_pleasantness']:.1f}/10 over your preferred time window."
+        )
+
+    @classmethod
+    def reason_prompt(cls, best: dict, user_profile: dict, context: dict) -> str:
+        return f"""
+        In 2-3 sentences, explain to the user why this perfume suits them.
+        perfume: {best['perfume']} by {best['brand']} ({best['fragrance_family']})
+        mood: {context["mood"]}
+        activity: {context["activity"]}
+        temperature: {context["temperature"]}
+        humidity: {context["humidity"]}
+        user_profile: {user_profile}
+        model scores: {cls.template_reason(best)}
+        """
+
+    @classmethod
+    async def aexplain_recommendation(
+        cls, best: dict, user_profile: dict, context: dict
+    ) -> str:
+        """Reason text for a locally ranked perfume, written by the LLM when enabled"""
+        reason = cls.template_reason(best)
+        if not LLM_REASON_ENABLED:
+            return reason
+
+        try:
+            response = await cls.agenerate_content(
+                contents=cls.reason_prompt(best, user_profile, context)
+            )
+            return response.text.strip() or reason
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # includes timeouts, the templated reason is good enough
+            logger.warning("Failed to generate recommendation reason: %s", e)
+            return reason
+
+    @classmethod
+    def recommendation_prompt(cls, user_profile: dict, context: dict) -> str:
+        return f"""
+                    Recommend perfume based on user unique profile, current mood, activity and current weather condition
+                    mood: {context["mood"]}
+                    activity: {context["activity"]}
+                    primary_climate: {context["primary_climate"]}
+                    temperature: {context["temperature"]}
+                    humidity: {context["humidity"]}
+                    user_profile: {user_profile}
+
+                    Please provide your response in the following JSON format:
+
+                    {{
+                      "perfume": "Name of the main recommended perfume",
+                      "reason": "Detailed explanation of why this perfume matches the user's profile",
+                      "other_perfumes_to_try": [
+                        {{
+                          "name": "Alternative perfume name 1",
+                          "image_url": "https://example.com/image1.jpg",
+                          "price": 85.50
+                        }},
+                        {{
+                          "name": "Alternative perfume name 2",
+                          "image_url": "https://example.com/image2.jpg",
+                          "price": 120.00
+                        }},
+                        {{
+                          "name": "Alternative perfume name 3",
+                          "image_url": "https://example.com/image3.jpg",
+                          "price": 95.25
+                        }}
+                      ],
+                      "predicted_longevity": 8.5,
+                      "predicted_projection": 7.2,
+                      "predicted_sillage": 6.8,
+                      "predicted_pleasantness": 8.9,
+                      "utility_score": 0.85,
+                      "image_url": "https://example.com/main-image.jpg",
+                      "price": 110.00,
+                      "context_mood": "{context["mood"]}",
+                      "context_activity": "{context["activity"]}",
+                      "context_temperature": {context["temperature"]},
+                      "context_humidity": {context["humidity"]}
+                    }}
+
+                    Guidelines:
+                    - Provide 2-3 alternative perfumes in other_perfumes_to_try
+                    - Each alternative should have name, image_url, and price
+                    - Prices should be realistic for luxury perfumes (typically $50-$300)
+                    - Make sure alternatives are suitable for the user's profile
+                    - Focus on different perfume families or price ranges for variety
+                    """
+
+    @classmethod
+    async def agenerate_recommendation(cls, user_profile: dict, context: dict) -> dict:
+        """Ask the LLM for the full recommendation, used when there is no local candidate"""
+        prompt = cls.recommendation_prompt(user_profile, context)
+
+        if sampled(logger):
+            logger.debug("Recommendation prompt", extra={"prompt": prompt})
+
+        response = await cls.agenerate_content(
             contents=prompt,
             config={
                 "response_mime_type": "application/json",
-                "response_schema": UserProfileSchema,
+                "response_schema": AIResponseSchema,
             },
         )
 
         response_data = json.loads(response.text)
-        print(response_data)
+        if sampled(logger):
+            logger.debug("Recommendation response", extra={"response": response_data})
+        return response_data
+
+    @classmethod
+    def profile_prompt(cls, payload: ProfilePayload) -> str:
+        return f"""
+        Use answers to the following questions to build user profile. 
+        questions:{payload.questions}
+        answer: {payload.answers}
+        """
+
+    @classmethod
+    async def abuild_user_profile(cls, payload: ProfilePayload):
+        try:
+            response = await cls.agenerate_content(
+                contents=cls.profile_prompt(payload),
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": UserProfileSchema,
+                },
+            )
+        except asyncio.TimeoutError:
+            return APIResponse(
+                success=False, status_code=504, message="AI service timed out"
+            )
+
+        response_data = json.loads(response.text)
+        if sampled(logger):
+            logger.debug("Built user profile", extra={"profile": response_data})
 
         # ✅ Ensure user_id is included in the response data
         response_data["user_id"] = payload.user_id
@@ -156,13 +394,12 @@ class AIService:
     def get_perfume_image(perfume_name: str):
 
         try:
-            print("Searching the web....")
+            logger.debug("Searching the web for %s", perfume_name)
 
             search_query = f"{perfume_name} image"
             url = f"www.google.com/?q={perfume_name}"
             res = requests.get(url)
 
-            print("=========================================")
-            print("web search response: ", res)
+            logger.debug("Web search response: %s", res)
         except:
-            print("Error searching the web")
+            logger.warning("Error searching the web")
@@ -1,70 +1,108 @@
-from passlib.context import CryptContext
 from schema.login_schema import LoginSchema
 from db.core import get_session
 from db.models import User, AuthToken
 from schema.response_schema import APIResponse
+from service.pagination import page_response, DEFAULT_PAGE_SIZE
+from service.token_cache import ACCESS_TOKEN_MINUTES, RevokedTokens, VerifiedTokenCache
+from service.token_reaper import TokenReaper
+from service.hash_executor import HashExecutor, HasherBusy, busy_error
 
 
-from db.core import get_session
+from db.async_core import get_async_session
 from schema.auth_schema import AuthTokenSchema, TokenPayloadSchema
+from sqlalchemy import select, update
 import jwt
 from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
+from app_logging import get_logger
 
 load_dotenv()
 
 JWT_SECRET = os.environ["JWT_SECRET"]
 
 
-crypto_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = get_logger(__name__)
 
 
 class HashService:
+    """bcrypt runs in the HashExecutor process pool, see service/hash_executor.py"""
+
     @classmethod
     def hash_password(cls, password: str) -> str:
-        return crypto_context.hash(password)
+        return HashExecutor.hash(password)
+
+    @classmethod
+    async def ahash_password(cls, password: str) -> str:
+        return await HashExecutor.ahash(password)
 
     @classmethod
     def verify_password(cls, password: str, hash: str) -> bool:
-        return crypto_context.verify(password, hash)
+        return HashExecutor.verify_and_update(password, hash)[0]
+
+    @classmethod
+    async def averify_and_update(cls, password: str, hash: str) -> tuple[bool, str | None]:
+        """Check the password, with a new hash when the stored work factor is outdated"""
+        return await HashExecutor.averify_and_update(password, hash)
 
 
 class AuthService:
     @classmethod
-    def login(cls, user: LoginSchema) -> APIResponse:
-        with get_session() as db:
-            db_user = db.query(User).filter(User.username == user.username).first()
+    async def alogin(cls, user: LoginSchema) -> APIResponse:
+        """
+        Async so a login waiting on bcrypt holds no threadpool thread, the
+        sync CRUD routes keep those during a login burst
+        """
+        async with get_async_session() as db:
+            db_user = await db.scalar(
+                select(User).filter(User.username == user.username).limit(1)
+            )
             if db_user is None:
                 return APIResponse(
                     success=False,
                     message=f"Cannot find user with username : {user.username}",
                 )
 
-            if not HashService.verify_password(user.password, db_user.password):  # type: ignore
+            # give the connection back to the pool while bcrypt runs
+            user_id, password_hash = db_user.id, db_user.password
+            await db.rollback()
+
+            try:
+                verified, new_hash = await HashService.averify_and_update(
+                    user.password, password_hash  # type: ignore
+                )
+            except HasherBusy as e:
+                raise busy_error(e) from e
+
+            if not verified:
                 return APIResponse(
                     success=False, message=f"Incorrect username or password"
                 )
 
+            if new_hash is not None:
+                await db.execute(
+                    update(User).where(User.id == user_id).values(password=new_hash)
+                )
+                HashExecutor.count_rehash()
+                logger.info("Password rehashed", extra={"user_id": user_id})
+
             user_token = TokenService.generate_token(
                 {
-                    "user_id": db_user.id,
+                    "user_id": user_id,
                     "exp": datetime.now(timezone.utc),
                     "type": "access_token",
                 }
             )  # type: ignore
-            print("===================================" * 5)
-            print(user_token)
-            print("===================================" * 5)
-            db_token = TokenService.create_token(
-                {
-                    "token": user_token,
-                    "user_id": db_user.id,
-                    "expires_at": datetime.now(timezone.utc) + timedelta(days=3),
-                }
-            )  # type: ignore
+            db_token = AuthToken(
+                token=user_token,
+                user_id=user_id,
+                expires_at=datetime.now(timezone.utc) + timedelta(days=3),
+            )
+            db.add(db_token)
+            await db.commit()
+            await db.refresh(db_token)
 
-            print("db token", db_token)
+            logger.info("User logged in", extra={"user_id": user_id})
             return APIResponse(
                 success=True, message="Login successful", data=[db_token]
             )
@@ -72,7 +110,9 @@ class AuthService:
     @classmethod
     def logout(cls, token_id: int) -> APIResponse:
         try:
-            TokenService.delete_token(token_id)
+            response = TokenService.revoke_token(token_id)
+            if not response.success:
+                return response
             return APIResponse(success=True, message="Logout succesful")
         except:
             return APIResponse(success=False, message="Failed to logout")
@@ -82,8 +122,28 @@ class AuthService:
         pass
 
     @classmethod
-    def get_tokens_all(cls):
-        return TokenService.get_tokens_all()
+    def get_tokens_all(cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+        return TokenService.get_tokens_all(cursor, limit)
+
+    @classmethod
+    def get_reaper_stats(cls) -> APIResponse:
+        return APIResponse(
+            success=True, message="Token reaper stats", data=[TokenReaper.get_stats()]
+        )
+
+    @classmethod
+    def get_token_cache_stats(cls) -> APIResponse:
+        return APIResponse(
+            success=True,
+            message="Token cache stats",
+            data=[
+                {
+                    "verified": VerifiedTokenCache.get_stats(),
+                    "revoked": RevokedTokens.get_stats(),
+                    "hasher": HashExecutor.get_stats(),
+                }
+            ],
+        )
 
     @classmethod
     def delete_token(cls, token_id: int):
@@ -98,12 +158,46 @@ class TokenService:
 
     @classmethod
     def generate_token(cls, payload: TokenPayloadSchema) -> str:
-        print("Generating token......", end="")
-        payload["exp"] = datetime.now(timezone.utc) + timedelta(minutes=30)  # type: ignore
+        payload["exp"] = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_MINUTES)  # type: ignore
         token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")  # type: ignore
-        print("done")
         return token
 
+    @classmethod
+    def verify_token(cls, token: str) -> dict:
+        """
+        Checked payload of a token, raises jwt.PyJWTError when it is invalid,
+        expired or revoked. Answered from memory after the first decode
+        """
+        if RevokedTokens.contains(token):
+            raise jwt.InvalidTokenError("Token has been revoked")
+        payload = VerifiedTokenCache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+            VerifiedTokenCache.set(token, payload)
+        return payload
+
+    @classmethod
+    def revoke(cls, token: str, expires_at: datetime | None = None) -> None:
+        """Stop accepting a token in this process right away"""
+        RevokedTokens.add(token, expires_at)
+        VerifiedTokenCache.discard(token)
+
+    @classmethod
+    def revoke_token(cls, token_id: int) -> APIResponse:
+        """Mark the token deleted, kept so revocations survive a restart"""
+        with get_session() as db:
+            db_token = db.query(AuthToken).filter(AuthToken.id == token_id).first()
+            if not db_token:
+                return APIResponse(
+                    success=False, message=f"Cannot find token with id: {token_id}"
+                )
+            token, expires_at = db_token.token, db_token.expires_at
+            db_token.is_deleted = True  # type: ignore
+            db_token.updated_at = datetime.now()  # type: ignore
+            db.commit()
+            cls.revoke(token, expires_at)  # type: ignore
+            return APIResponse(success=True, message="Token revoked successfully")
+
     # save token to db
     @classmethod
     def create_token(cls, token: AuthTokenSchema) -> AuthToken:
@@ -131,8 +225,10 @@ class TokenService:
                     success=False, message=f"Cannot find token with id: {token_id}"
                 )
             try:
+                token, expires_at = db_token.token, db_token.expires_at
                 db.delete(db_token)
                 db.commit()
+                cls.revoke(token, expires_at)  # type: ignore
                 return APIResponse(success=True, message="Token deleted successfully")
             except:
                 return APIResponse(success=False, message=f"Failed to delete token")
@@ -148,17 +244,25 @@ class TokenService:
             return db_token
 
     @classmethod
-    def get_tokens_all(cls) -> list[AuthToken]:
+    def get_tokens_all(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
         with get_session() as db:
-            db_tokens = db.query(AuthToken).order_by(AuthToken.created_at.desc()).all()
-            return APIResponse(success=True, message="All good", data=db_tokens)
+            return page_response(db.query(AuthToken), AuthToken, cursor, limit)
 
     @classmethod
     def delete_tokens_all(cls):
         with get_session() as session:
             try:
+                live = (
+                    session.query(AuthToken.token, AuthToken.expires_at)
+                    .filter(AuthToken.is_deleted.isnot(True))
+                    .all()
+                )
                 session.query(AuthToken).delete()
                 session.commit()
+                for token, expires_at in live:
+                    cls.revoke(token, expires_at)
                 return APIResponse(success=True, message="Deleted all tokens")
             except:
                 return APIResponse(success=False, message="Failed to delete all tokens")
@@ -0,0 +1,249 @@
+from db.core import get_session
+from db.models import Recommendation, UserProfile
+from schema.ai_rec_payload_schema import AIRecPayloadSchema
+from schema.batch_recommendation_schema import BatchRecommendationSchema
+from schema.response_schema import APIResponse
+from service.ai_service import AIService
+from service.scoring_service import ScoringService
+from service.scoring_executor import ScoringExecutor, SCORING_WORKERS
+from service.simulation_service import SimulationService
+from datetime import datetime
+import os
+import time
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+MAX_CHUNK_SIZE = 5000
+# users one POST /recommendations/batch may ask for, full runs go through
+# precompute_recommendations.py
+MAX_HTTP_BATCH_USERS = int(os.getenv("BATCH_HTTP_MAX_USERS", "1000"))
+
+
+class BatchRecommendationService:
+    """
+    Precompute today's pick for many users at once.
+
+    Users are processed in chunks: one query loads the chunk's profiles, one
+    query finds who already has a recommendation today, every profile is
+    ranked against the in-memory catalog and the rows are written with a
+    single bulk insert. Profiles are grouped by environment and each group
+    is scored as one users x perfumes matrix (ScoringService.rank_many);
+    with workers > 1 the chunk is scored by the ScoringExecutor process pool.
+    Reasons are templated from the scores, no LLM call is made.
+    """
+
+    @classmethod
+    def precompute(cls, payload: BatchRecommendationSchema) -> APIResponse:
+        chunk_size = max(1, min(payload.chunk_size, MAX_CHUNK_SIZE))
+        # the pool's size is set by the server, a request can only use less of it
+        payload = payload.model_copy(
+            update={"workers": max(1, min(payload.workers, SCORING_WORKERS))}
+        )
+        totals = {
+            "requested": 0,
+            "created": 0,
+            "skipped_existing": 0,
+            "missing_profile": 0,
+            "no_candidates": 0,
+            "failed": 0,
+            "chunks": 0,
+            "shards": 0,
+            "shard_seconds_max": 0.0,
+        }
+        start = time.perf_counter()
+
+        try:
+            for user_ids in cls.chunks(payload.user_ids, chunk_size):
+                result = cls.precompute_chunk(user_ids, payload)
+                for field, value in result.items():
+                    if field == "shard_seconds_max":
+                        totals[field] = max(totals[field], value)
+                    else:
+                        totals[field] += value
+                totals["requested"] += len(user_ids)
+                totals["chunks"] += 1
+        except Exception as e:
+            logger.exception("Batch recommendation failed")
+            return APIResponse(
+                success=False,
+                status_code=500,
+                message="Batch recommendation failed",
+                data=[totals],
+            )
+
+        totals["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+        return APIResponse(
+            success=True, message="Batch recommendations created", data=[totals]
+        )
+
+    @classmethod
+    def chunks(cls, user_ids: list[int] | None, chunk_size: int):
+        """User ids in chunks, walking user_profiles by user_id when none are given"""
+        if user_ids is not None:
+            unique = list(dict.fromkeys(user_ids))
+            for offset in range(0, len(unique), chunk_size):
+                yield unique[offset : offset + chunk_size]
+            return
+
+        last_user_id = 0
+        while True:
+            with get_session() as session:
+                rows = (
+                    session.query(UserProfile.user_id)
+                    .filter(UserProfile.user_id > last_user_id)
+                    .order_by(UserProfile.user_id)
+                    .distinct()
+                    .limit(chunk_size)
+                    .all()
+                )
+            if not rows:
+                return
+            chunk = [row.user_id for row in rows]
+            last_user_id = chunk[-1]
+            yield chunk
+
+    @classmethod
+    def precompute_chunk(
+        cls, user_ids: list[int], payload: BatchRecommendationSchema
+    ) -> dict:
+        result = {
+            "created": 0,
+            "skipped_existing": 0,
+            "missing_profile": 0,
+            "no_candidates": 0,
+            "failed": 0,
+            "shards": 0,
+            "shard_seconds_max": 0.0,
+        }
+
+        with get_session() as session:
+            profiles = {
+                profile.user_id: profile
+                for profile in session.query(UserProfile)
+                .filter(UserProfile.user_id.in_(user_ids))
+                .all()
+            }
+            result["missing_profile"] = len(set(user_ids) - profiles.keys())
+
+            if payload.skip_existing and profiles:
+                today = datetime.utcnow().replace(
+                    hour=0, minute=0, second=0, microsecond=0
+                )
+                existing = {
+                    row.user_id
+                    for row in session.query(Recommendation.user_id)
+                    .filter(
+                        Recommendation.user_id.in_(list(profiles)),
+                        Recommendation.created_at > today,
+                    )
+                    .distinct()
+                }
+                result["skipped_existing"] = len(existing)
+                for user_id in existing:
+                    del profiles[user_id]
+
+            scoring_context = {
+                "temperature": payload.temperature,
+                "humidity": payload.humidity,
+            }
+            # users sharing an environment reuse the same cached curves back to back
+            ordered = sorted(
+                profiles.values(),
+                key=lambda profile: SimulationService.environment(
+                    profile, scoring_context
+                ),
+            )
+
+            ranked_by_user = {}
+            if payload.workers > 1 and ordered:
+                ranked_by_user, timings = ScoringExecutor.rank_many(
+                    ordered, scoring_context, workers=payload.workers
+                )
+                result["shards"] = len(timings)
+                result["shard_seconds_max"] = max(
+                    timing["seconds"] for timing in timings
+                )
+            elif ordered:
+                try:
+                    ranked_by_user = ScoringService.rank_many(ordered, scoring_context)
+                except Exception as e:
+                    # one bad profile fails the matrix, fall back to user by user
+                    logger.exception("Failed to score chunk, ranking users one by one")
+
+            rows = []
+            for profile in ordered:
+                try:
+                    ranked = ranked_by_user.get(profile.user_id)
+                    if ranked is None:
+                        ranked = ScoringService.rank(profile, scoring_context)
+                    mapping = cls.recommendation_row(profile, ranked, payload)
+                except Exception as e:
+                    logger.exception(
+                        "Failed to score user", extra={"user_id": profile.user_id}
+                    )
+                    result["failed"] += 1
+                    continue
+                if mapping is None:
+                    result["no_candidates"] += 1
+                    continue
+                rows.append(mapping)
+
+            if rows:
+                try:
+                    session.bulk_insert_mappings(Recommendation, rows)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    logger.exception("Failed to insert %d recommendations", len(rows))
+                    result["failed"] += len(rows)
+                    return result
+            result["created"] = len(rows)
+
+        return result
+
+    @classmethod
+    def recommendation_row(
+        cls,
+        profile: UserProfile,
+        ranked: list[dict],
+        payload: BatchRecommendationSchema,
+    ) -> dict | None:
+        """Recommendation column values for one profile, None if nothing was ranked"""
+        if not ranked:
+            return None
+
+        request = AIRecPayloadSchema(
+            user_id=profile.user_id,
+            mood=payload.mood,
+            activity=payload.activity,
+            primary_climate=payload.primary_climate,
+            temperature=payload.temperature,
+            humidity=payload.humidity,
+        )
+        context = AIService.recommendation_context(request, profile.to_dict())
+        response_data = AIService.ranked_response(ranked, context)
+
+        now = datetime.now()
+        return {
+            "user_id": profile.user_id,
+            "perfume_id": response_data["perfume_id"],
+            "ai_perfume_name": response_data["perfume"],
+            "reason": AIService.template_reason(ranked[0]),
+            "price": response_data["price"],
+            "image_url": response_data["image_url"],
+            "other_perfumes_to_try": response_data["other_perfumes_to_try"],
+            "predicted_longevity": response_data["predicted_longevity"],
+            "predicted_projection": response_data["predicted_projection"],
+            "predicted_sillage": response_data["predicted_sillage"],
+            "predicted_pleasantness": response_data["predicted_pleasantness"],
+            "utility_score": response_data["utility_score"],
+            "context_mood": response_data["context_mood"],
+            "context_activity": response_data["context_activity"],
+            "context_temperature": response_data["context_temperature"],
+            "context_humidity": response_data["context_humidity"],
+            "recommendation_date": now,
+            "created_at": now,
+        }
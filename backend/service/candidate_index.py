@@ -0,0 +1,128 @@
+import numpy as np
+import threading
+
+
+def _norm(value) -> str:
+    return str(value).strip().lower() if value else ""
+
+
+def _split(value) -> list[str]:
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value).split(",")
+    return [_norm(item) for item in items if _norm(item) and _norm(item) != "none"]
+
+
+def to_bitset(mask: np.ndarray) -> int:
+    """Pack a boolean row mask into an int, bit i set means row i is in the set"""
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def to_rows(bitset: int, size: int) -> np.ndarray:
+    """Row indices of the set bits, in ascending order"""
+    raw = np.frombuffer(bitset.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")[:size])
+
+
+class CandidateIndex:
+    """
+    Inverted index over a feature store snapshot for the hard constraints of the
+    rule based filter: allergens, disliked families, gender presentation and budget.
+
+    Every indexed value maps to a bitset of snapshot rows, so pruning a profile is
+    a handful of ORs/ANDs plus a binary search on the sorted prices. One index is
+    kept per snapshot version and rebuilt lazily after a catalog write.
+    """
+
+    _lock = threading.Lock()
+    _index: dict | None = None
+
+    @classmethod
+    def for_snapshot(cls, snapshot: dict) -> dict:
+        index = cls._index
+        if index is not None and index["version"] == snapshot["version"]:
+            return index
+
+        with cls._lock:
+            if cls._index is None or cls._index["version"] != snapshot["version"]:
+                cls._index = cls._build(snapshot)
+            return cls._index
+
+    @classmethod
+    def _build(cls, snapshot: dict) -> dict:
+        size = len(snapshot["ids"])
+        notes = snapshot["top_notes"] | snapshot["middle_notes"] | snapshot["base_notes"]
+
+        def by_column(matrix: np.ndarray, vocabulary: str) -> dict:
+            return {
+                value: to_bitset(matrix[:, column])
+                for value, column in snapshot["vocab"][vocabulary].items()
+            }
+
+        def by_value(values: np.ndarray) -> dict:
+            return {value: to_bitset(values == value) for value in set(values.tolist())}
+
+        price = snapshot["price"]
+        priced = np.flatnonzero(~np.isnan(price))
+        order = priced[np.argsort(price[priced], kind="stable")]
+
+        return {
+            "version": snapshot["version"],
+            "size": size,
+            "all": (1 << size) - 1,
+            "allergens": by_column(snapshot["allergen_matrix"], "allergens"),
+            "notes": by_column(notes, "notes"),
+            "families": by_value(snapshot["families"]),
+            "genders": by_value(snapshot["genders"]),
+            "price_order": order,
+            "price_sorted": price[order],
+            "unpriced": to_bitset(np.isnan(price)),
+        }
+
+    @classmethod
+    def matching(cls, postings: dict, terms) -> int:
+        """Union of the bitsets of every indexed value containing one of the terms"""
+        bitset = 0
+        for value, rows in postings.items():
+            if any(term in value for term in terms):
+                bitset |= rows
+        return bitset
+
+    @classmethod
+    def price_range(cls, index: dict, low: float | None, high: float | None) -> int:
+        """Rows priced within [low, high]; perfumes without a price are kept"""
+        prices = index["price_sorted"]
+        start = np.searchsorted(prices, low, side="left") if low else 0
+        end = np.searchsorted(prices, high, side="right") if high else len(prices)
+        mask = np.zeros(index["size"], dtype=bool)
+        mask[index["price_order"][start:end]] = True
+        return to_bitset(mask) | index["unpriced"]
+
+    @classmethod
+    def candidates(cls, snapshot: dict, profile) -> np.ndarray:
+        """Snapshot rows that survive the profile's hard constraints"""
+        index = cls.for_snapshot(snapshot)
+        allowed = index["all"]
+
+        allergies = _split(profile.allergies)
+        if allergies:
+            allowed &= ~cls.matching(index["allergens"], allergies)
+            allowed &= ~cls.matching(index["notes"], allergies)
+
+        disliked = set(_split(profile.disliked_families))
+        for family in disliked:
+            allowed &= ~index["families"].get(family, 0)
+
+        gender = _norm(profile.gender_presentation)
+        if gender in ("feminine", "masculine"):
+            allowed &= index["genders"].get(gender, 0) | index["genders"].get(
+                "unisex", 0
+            )
+
+        if profile.budget_min or profile.budget_max:
+            allowed &= cls.price_range(index, profile.budget_min, profile.budget_max)
+
+        return to_rows(allowed, index["size"])
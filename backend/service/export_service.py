@@ -0,0 +1,86 @@
+from db.core import get_session
+from sqlalchemy import select
+from datetime import date, datetime
+import csv
+import io
+import json
+import os
+
+
+# rows fetched per round trip and written per chunk of the response body
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class ExportService:
+    """
+    Row by row table exports for StreamingResponse.
+
+    Rows are read as plain Core tuples through a server side cursor
+    (yield_per) and encoded one batch at a time, so memory stays flat no
+    matter how many rows match. The generators open their own session since
+    they run after the request handler has returned.
+    """
+
+    @classmethod
+    def stream(
+        cls,
+        model,
+        export_format: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ):
+        table = model.__table__
+        statement = select(table).order_by(table.c.id)
+        if start is not None:
+            statement = statement.where(table.c.created_at >= start)
+        if end is not None:
+            statement = statement.where(table.c.created_at < end)
+
+        columns = [column.name for column in table.columns]
+        encode = cls.ndjson_rows if export_format == "ndjson" else cls.csv_rows
+
+        with get_session() as session:
+            result = session.execute(
+                statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            if export_format == "csv":
+                yield cls.csv_rows(columns, [columns])
+            for rows in result.partitions():
+                yield encode(columns, rows)
+
+    @classmethod
+    def ndjson_rows(cls, columns: list[str], rows) -> str:
+        return "".join(
+            json.dumps(
+                {column: _json_value(value) for column, value in zip(columns, row)},
+                default=str,
+            )
+            + "\n"
+            for row in rows
+        )
+
+    @classmethod
+    def csv_rows(cls, columns: list[str], rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [_csv_value(value) for value in row] for row in rows
+        )
+        return buffer.getvalue()
@@ -0,0 +1,181 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+import asyncio
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# bcrypt work factor for new hashes, older hashes below it are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 hashes in the calling thread (scripts, tests)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+# hashes running or waiting at once, callers past it wait up to HASH_QUEUE_TIMEOUT_SECONDS
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", str(max(HASH_WORKERS, 1) * 4)))
+HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("HASH_QUEUE_TIMEOUT_SECONDS", "2"))
+HASH_START_METHOD = os.getenv("HASH_START_METHOD", "spawn")
+# Retry-After sent with the 503 when the queue is full
+HASH_RETRY_AFTER_SECONDS = max(1, math.ceil(HASH_QUEUE_TIMEOUT_SECONDS))
+
+# contexts built in this process, keyed by work factor
+_contexts: dict[int, CryptContext] = {}
+
+
+def crypt_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+        )
+        _contexts[rounds] = context
+    return context
+
+
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hash: str, rounds: int) -> tuple[bool, str | None]:
+    """(matches, new hash when the stored one is below the current policy)"""
+    return crypt_context(rounds).verify_and_update(password, hash)
+
+
+class HasherBusy(Exception):
+    """Every hashing slot stayed taken for HASH_QUEUE_TIMEOUT_SECONDS"""
+
+
+def busy_error(error: HasherBusy) -> HTTPException:
+    """503 with Retry-After for a request the full hashing queue turned away"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+class HashExecutor:
+    """
+    Runs bcrypt in a ProcessPoolExecutor so a burst of logins uses every core
+    and never holds the server's GIL. At most HASH_QUEUE_SIZE hashes are
+    queued or running, further callers wait for a slot and get HasherBusy
+    when none frees up in time, so an auth storm cannot pile up unbounded
+    work behind the other endpoints.
+    """
+
+    _lock = threading.Lock()
+    _pool: ProcessPoolExecutor | None = None
+    _slots = threading.BoundedSemaphore(HASH_QUEUE_SIZE)
+    stats = {"submitted": 0, "rejected": 0, "rehashed": 0}
+
+    @classmethod
+    def hash(cls, password: str) -> str:
+        return cls._call(_hash, password, BCRYPT_ROUNDS)
+
+    @classmethod
+    def verify_and_update(cls, password: str, hash: str) -> tuple[bool, str | None]:
+        return cls._call(_verify_and_update, password, hash, BCRYPT_ROUNDS)
+
+    @classmethod
+    async def ahash(cls, password: str) -> str:
+        return await cls._acall(_hash, password, BCRYPT_ROUNDS)
+
+    @classmethod
+    async def averify_and_update(cls, password: str, hash: str) -> tuple[bool, str | None]:
+        return await cls._acall(_verify_and_update, password, hash, BCRYPT_ROUNDS)
+
+    @classmethod
+    def _call(cls, fn, *args):
+        if HASH_WORKERS <= 0:
+            return fn(*args)
+        if not cls._slots.acquire(timeout=HASH_QUEUE_TIMEOUT_SECONDS):
+            cls._reject()
+        return cls._submit(fn, *args).result()
+
+    @classmethod
+    async def _acall(cls, fn, *args):
+        if HASH_WORKERS <= 0:
+            return fn(*args)
+        if not cls._slots.acquire(blocking=False):
+            # wait for a slot off the event loop
+            waiter = asyncio.ensure_future(
+                asyncio.to_thread(cls._slots.acquire, timeout=HASH_QUEUE_TIMEOUT_SECONDS)
+            )
+            try:
+                acquired = await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # the thread keeps waiting, give back a slot it gets after we left
+                waiter.add_done_callback(cls._release_unused)
+                raise
+            if not acquired:
+                cls._reject()
+        return await asyncio.wrap_future(cls._submit(fn, *args))
+
+    @classmethod
+    def _release_unused(cls, waiter: asyncio.Future) -> None:
+        if not waiter.cancelled() and waiter.exception() is None and waiter.result():
+            cls._slots.release()
+
+    @classmethod
+    def _submit(cls, fn, *args) -> Future:
+        """Run fn in the pool, the caller already holds a slot"""
+        try:
+            future = cls.pool().submit(fn, *args)
+        except Exception:
+            cls._slots.release()
+            raise
+        future.add_done_callback(lambda _: cls._slots.release())
+        with cls._lock:
+            cls.stats["submitted"] += 1
+        return future
+
+    @classmethod
+    def _reject(cls):
+        with cls._lock:
+            cls.stats["rejected"] += 1
+        logger.warning("Password hashing queue is full")
+        raise HasherBusy("Too many password checks in progress, try again")
+
+    @classmethod
+    def count_rehash(cls) -> None:
+        with cls._lock:
+            cls.stats["rehashed"] += 1
+
+    @classmethod
+    def pool(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._pool is None:
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=HASH_WORKERS,
+                    mp_context=multiprocessing.get_context(HASH_START_METHOD),
+                )
+            return cls._pool
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._lock:
+            return {
+                **cls.stats,
+                "workers": HASH_WORKERS,
+                "queue_size": HASH_QUEUE_SIZE,
+                "rounds": BCRYPT_ROUNDS,
+            }
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.shutdown(wait=True)
+                cls._pool = None
+
+
+atexit.register(HashExecutor.shutdown)
@@ -2,21 +2,23 @@ from db.core import get_session
 from db.models import Log
 from schema.log_schema import LogSchema
 from schema.response_schema import APIResponse
+from service.pagination import page_response, DEFAULT_PAGE_SIZE
+from service.log_sink import LogSink
 
 
 class LogService:
     @classmethod
     def create_log(cls, _log: LogSchema) -> APIResponse:
-        with get_session() as session:
-            try:
-                log_item = Log(**_log.dict())
-                session.add(log_item)
-                session.commit()
-                return APIResponse(success=True, message="created log successfully")
-            except:
-                return APIResponse(
-                    success=False, status_code=500, message="Failed to create log"
-                )
+        """Hand the row to the write-behind sink, it is inserted with the next batch"""
+        if not LogSink.write(_log.dict()):
+            return APIResponse(
+                success=False, status_code=503, message="Log queue is full, log dropped"
+            )
+        return APIResponse(success=True, message="Log queued")
+
+    @classmethod
+    def get_sink_stats(cls) -> APIResponse:
+        return APIResponse(success=True, message="Log sink stats", data=[LogSink.get_stats()])
 
     @classmethod
     def update_log(cls, log_id: int, log: LogSchema) -> APIResponse:
@@ -78,14 +80,11 @@ class LogService:
                 return APIResponse(success=True, message="Found log", data=[db_log])
 
     @classmethod
-    def get_logs_all(cls) -> APIResponse:
+    def get_logs_all(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
         with get_session() as session:
-            db_logs = session.query(Log).all()
-
-            if not db_logs:
-                db_logs = []
-
-            return APIResponse(success=True, message="All good", data=db_logs)
+            return page_response(session.query(Log), Log, cursor, limit)
 
     # THIS IS A DANGEROUS OPERATION: DON'T TRY!!!!!!!!!!!
     @classmethod
@@ -0,0 +1,205 @@
+from db.core import get_session
+from db.models import Log
+from datetime import datetime
+import os
+import queue
+import threading
+import time
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", "1.0"))
+# what a full queue does: drop_newest, drop_oldest or block (wait up to LOG_BLOCK_SECONDS)
+LOG_QUEUE_POLICY = os.getenv("LOG_QUEUE_POLICY", "drop_newest")
+LOG_BLOCK_SECONDS = float(os.getenv("LOG_BLOCK_SECONDS", "0.05"))
+LOG_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("LOG_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+# a failed batch insert is retried this many times, the wait doubling from
+# LOG_RETRY_BACKOFF_SECONDS up to LOG_RETRY_BACKOFF_MAX_SECONDS
+LOG_INSERT_RETRIES = int(os.getenv("LOG_INSERT_RETRIES", "5"))
+LOG_RETRY_BACKOFF_SECONDS = float(os.getenv("LOG_RETRY_BACKOFF_SECONDS", "0.2"))
+LOG_RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("LOG_RETRY_BACKOFF_MAX_SECONDS", "5"))
+
+LOG_QUEUE_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+
+class LogSink:
+    """
+    Write-behind sink for the logs table.
+
+    write() only puts the row on a bounded in-memory queue, a background
+    thread drains it and bulk inserts a batch once LOG_BATCH_SIZE rows are
+    waiting or LOG_FLUSH_INTERVAL_SECONDS have passed since the first one,
+    so a request never waits on a log commit. When the queue is full the
+    LOG_QUEUE_POLICY decides which row is lost. A batch whose insert fails
+    (locked database, dropped connection) is retried with a bounded backoff,
+    rows arriving meanwhile wait on the queue under the same policy; only a
+    batch that fails every retry is lost and counted as failed. Rows still
+    queued when the app stops are flushed by stop(). Until start() is called
+    (scripts, CLIs) rows are written synchronously.
+    """
+
+    _queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _worker: threading.Thread | None = None
+    _stopping = threading.Event()
+    _lock = threading.Lock()
+    stats = {
+        "enqueued": 0,
+        "written": 0,
+        "dropped": 0,
+        "failed": 0,
+        "retries": 0,
+        "batches": 0,
+        "batch_seconds_max": 0.0,
+    }
+
+    @classmethod
+    def start(cls) -> None:
+        if cls.running():
+            return
+        if LOG_QUEUE_POLICY not in LOG_QUEUE_POLICIES:
+            raise ValueError(f"LOG_QUEUE_POLICY must be one of {LOG_QUEUE_POLICIES}")
+        cls._stopping.clear()
+        cls._worker = threading.Thread(target=cls._run, name="log-sink", daemon=True)
+        cls._worker.start()
+
+    @classmethod
+    def stop(cls, timeout: float = LOG_SHUTDOWN_TIMEOUT_SECONDS) -> None:
+        """Stop the worker after it has written everything still queued"""
+        if cls._worker is None:
+            return
+        cls._stopping.set()
+        cls._worker.join(timeout)
+        if cls._worker.is_alive():
+            logger.warning(
+                "Log sink did not finish within %ss, %d rows left",
+                timeout,
+                cls._queue.qsize(),
+            )
+        cls._worker = None
+
+    @classmethod
+    def running(cls) -> bool:
+        return cls._worker is not None and cls._worker.is_alive()
+
+    @classmethod
+    def write(cls, row: dict) -> bool:
+        """Queue one log row, returns False when it was dropped"""
+        # the row is timestamped when the event happened, not when it is flushed
+        row = {"created_at": datetime.now(), **row}
+
+        if not cls.running():
+            cls._insert([row])
+            return True
+
+        if cls._put(row):
+            cls._count("enqueued")
+            return True
+        cls._count("dropped")
+        return False
+
+    @classmethod
+    def _put(cls, row: dict) -> bool:
+        try:
+            if LOG_QUEUE_POLICY == "block":
+                cls._queue.put(row, timeout=LOG_BLOCK_SECONDS)
+            else:
+                cls._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            if LOG_QUEUE_POLICY != "drop_oldest":
+                return False
+
+        # make room by losing the oldest row instead of this one
+        try:
+            cls._queue.get_nowait()
+            cls._count("dropped")
+        except queue.Empty:
+            pass
+        try:
+            cls._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            return False
+
+    @classmethod
+    def _run(cls) -> None:
+        while not (cls._stopping.is_set() and cls._queue.empty()):
+            try:
+                batch = [cls._queue.get(timeout=LOG_FLUSH_INTERVAL_SECONDS)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + LOG_FLUSH_INTERVAL_SECONDS
+            while len(batch) < LOG_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if cls._stopping.is_set():
+                    remaining = 0
+                try:
+                    batch.append(
+                        cls._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else cls._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+
+            cls._insert(batch)
+
+    @classmethod
+    def _insert(cls, rows: list[dict]) -> None:
+        start = time.perf_counter()
+        backoff = LOG_RETRY_BACKOFF_SECONDS
+        for attempt in range(LOG_INSERT_RETRIES + 1):
+            try:
+                with get_session() as session:
+                    session.bulk_insert_mappings(Log, rows)
+                    session.commit()
+                break
+            except Exception:
+                if attempt == LOG_INSERT_RETRIES:
+                    logger.exception(
+                        "Failed to write %d log rows after %d retries",
+                        len(rows),
+                        LOG_INSERT_RETRIES,
+                    )
+                    cls._count("failed", len(rows))
+                    return
+                logger.warning(
+                    "Failed to write %d log rows, retrying in %ss",
+                    len(rows),
+                    backoff,
+                    exc_info=True,
+                )
+                cls._count("retries")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, LOG_RETRY_BACKOFF_MAX_SECONDS)
+
+        seconds = time.perf_counter() - start
+        with cls._lock:
+            cls.stats["written"] += len(rows)
+            cls.stats["batches"] += 1
+            cls.stats["batch_seconds_max"] = max(cls.stats["batch_seconds_max"], seconds)
+
+    @classmethod
+    def _count(cls, name: str, amount: int = 1) -> None:
+        with cls._lock:
+            cls.stats[name] += amount
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._lock:
+            stats = dict(cls.stats)
+        return {
+            **stats,
+            "queued": cls._queue.qsize(),
+            "queue_size": LOG_QUEUE_SIZE,
+            "batch_size": LOG_BATCH_SIZE,
+            "flush_interval_seconds": LOG_FLUSH_INTERVAL_SECONDS,
+            "policy": LOG_QUEUE_POLICY,
+            "running": cls.running(),
+        }
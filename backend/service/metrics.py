@@ -0,0 +1,162 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+import threading
+import time
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (128, 1024, 8192, 65536, 524288, 4194304, 33554432)
+
+# phase -> seconds spent in it by the current request, set by the metrics middleware
+request_timers: ContextVar[dict | None] = ContextVar("request_timers", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    In-process counters, gauges and histograms rendered in the Prometheus
+    text format for GET /metrics. Each worker process keeps its own numbers.
+
+    Request phases (db, llm, serialization) are timed through request_timers:
+    Metrics.timer() adds its elapsed time to the current request, outside a
+    request it is a no-op.
+    """
+
+    _lock = threading.Lock()
+    _meta: dict[str, tuple[str, str]] = {}  # name -> (type, help)
+    _counters: dict[tuple, float] = {}
+    _gauges: dict[tuple, float] = {}
+    _histograms: dict[tuple, dict] = {}
+
+    @classmethod
+    def _key(cls, name: str, kind: str, help_text: str, labels: dict | None) -> tuple:
+        cls._meta.setdefault(name, (kind, help_text))
+        return (name, tuple(sorted((labels or {}).items())))
+
+    @classmethod
+    def inc(cls, name: str, help_text: str, labels: dict | None = None, amount: float = 1) -> None:
+        with cls._lock:
+            key = cls._key(name, "counter", help_text, labels)
+            cls._counters[key] = cls._counters.get(key, 0) + amount
+
+    @classmethod
+    def add_gauge(cls, name: str, help_text: str, amount: float, labels: dict | None = None) -> None:
+        with cls._lock:
+            key = cls._key(name, "gauge", help_text, labels)
+            cls._gauges[key] = cls._gauges.get(key, 0) + amount
+
+    @classmethod
+    def observe(
+        cls,
+        name: str,
+        help_text: str,
+        value: float,
+        labels: dict | None = None,
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> None:
+        with cls._lock:
+            key = cls._key(name, "histogram", help_text, labels)
+            histogram = cls._histograms.get(key)
+            if histogram is None:
+                histogram = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+                cls._histograms[key] = histogram
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["counts"][index] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @classmethod
+    @contextmanager
+    def timer(cls, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.add_time(phase, time.perf_counter() - start)
+
+    @classmethod
+    def add_time(cls, phase: str, seconds: float) -> None:
+        timers = request_timers.get()
+        if timers is not None:
+            timers[phase] = timers.get(phase, 0.0) + seconds
+
+    @classmethod
+    def render(cls) -> str:
+        with cls._lock:
+            meta = dict(cls._meta)
+            counters = dict(cls._counters)
+            gauges = dict(cls._gauges)
+            histograms = {
+                key: {**value, "counts": list(value["counts"])}
+                for key, value in cls._histograms.items()
+            }
+
+        lines = []
+        for name in sorted(meta):
+            kind, help_text = meta[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (metric, labels), histogram in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                        cumulative += count
+                        bucket_labels = _labels({**dict(labels), "le": _number(bound)})
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f'{name}_bucket{_labels({**dict(labels), "le": "+Inf"})} {histogram["count"]}')
+                    lines.append(f"{name}_sum{_labels(dict(labels))} {_number(histogram['sum'])}")
+                    lines.append(f"{name}_count{_labels(dict(labels))} {histogram['count']}")
+            else:
+                values = counters if kind == "counter" else gauges
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(dict(labels))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._meta.clear()
+            cls._counters.clear()
+            cls._gauges.clear()
+            cls._histograms.clear()
+
+
+# every engine, sync and the async engine's sync_engine, reports statement time
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if starts:
+        Metrics.add_time("db", time.perf_counter() - starts.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
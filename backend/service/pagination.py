@@ -0,0 +1,100 @@
+from schema.response_schema import APIResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+from datetime import datetime
+import base64
+import json
+import os
+
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class PageResponse(APIResponse):
+    """APIResponse for one page of a listing, pass next_cursor back to get the next one"""
+
+    def __init__(self, next_cursor: str | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.next_cursor = next_cursor
+
+    def to_dict(self):
+        return {**super().to_dict(), "next_cursor": self.next_cursor}
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def keyset(statement, model, cursor: str | None, limit: int):
+    """
+    Keyset page of a Query or Select, newest first by (created_at, id), read
+    backwards along the (created_at, id) index. Only limit + 1 rows are read
+    whatever the table size
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        statement = statement.filter(
+            or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id),
+            )
+        )
+
+    return statement.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def next_page(rows: list, limit: int) -> tuple[list, str | None]:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, None
+
+
+def paginate(query: Query, model, cursor: str | None, limit: int) -> tuple[list, str | None]:
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return next_page(keyset(query, model, cursor, limit).all(), limit)
+
+
+async def apaginate(
+    session: AsyncSession, model, cursor: str | None, limit: int, statement=None
+) -> tuple[list, str | None]:
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    statement = select(model) if statement is None else statement
+    rows = (await session.scalars(keyset(statement, model, cursor, limit))).all()
+    return next_page(list(rows), limit)
+
+
+def page_response(
+    query: Query, model, cursor: str | None, limit: int, message: str = "All good"
+) -> APIResponse:
+    try:
+        rows, next_cursor = paginate(query, model, cursor, limit)
+    except InvalidCursor as e:
+        return APIResponse(success=False, status_code=400, message=str(e))
+    return PageResponse(success=True, message=message, data=rows, next_cursor=next_cursor)
+
+
+async def apage_response(
+    session: AsyncSession, model, cursor: str | None, limit: int, message: str = "All good"
+) -> APIResponse:
+    try:
+        rows, next_cursor = await apaginate(session, model, cursor, limit)
+    except InvalidCursor as e:
+        return APIResponse(success=False, status_code=400, message=str(e))
+    return PageResponse(success=True, message=message, data=rows, next_cursor=next_cursor)
@@ -0,0 +1,375 @@
+from db.core import get_session
+from db.models import Perfume
+import numpy as np
+import threading
+
+
+CONCENTRATION_STRENGTH = {
+    "edc": 0.6,
+    "edt": 0.8,
+    "edp": 1.0,
+    "parfum": 1.2,
+    "extrait": 1.3,
+}
+INTENSITY_LEVELS = {"light": 0, "skin scent": 0, "moderate": 1, "strong": 2}
+PROJECTION_LEVELS = {
+    "close": 0,
+    "close to skin": 0,
+    "moderate": 1,
+    "arm's length": 1,
+    "arms length": 1,
+    "strong": 2,
+    "room-filling": 2,
+}
+SILLAGE_LEVELS = {"light": 0, "moderate": 1, "heavy": 2}
+
+TIERS = ("top_notes", "middle_notes", "base_notes")
+# vocabularies that get a one-hot / multi-hot block in the snapshot
+VOCABULARIES = ("notes", "families", "concentrations", "allergens")
+# every per-row column of a snapshot and how it is stored
+COLUMNS = {
+    "ids": np.int64,
+    "names": list,
+    "brands": list,
+    "image_urls": list,
+    "families": object,
+    "genders": object,
+    "seasons": object,
+    "price": float,
+    "strength": float,
+    "intensity": float,
+    "projection": float,
+    "sillage": float,
+    "longevity": float,
+    "note_counts": float,
+    "top_notes": bool,
+    "middle_notes": bool,
+    "base_notes": bool,
+    "family_onehot": bool,
+    "concentration_onehot": bool,
+    "allergen_matrix": bool,
+}
+MATRICES = {
+    "top_notes": "notes",
+    "middle_notes": "notes",
+    "base_notes": "notes",
+    "family_onehot": "families",
+    "concentration_onehot": "concentrations",
+    "allergen_matrix": "allergens",
+}
+
+
+def _norm(value) -> str:
+    return str(value).strip().lower() if value else ""
+
+
+def _split(value) -> list[str]:
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value).split(",")
+    return [_norm(item) for item in items if _norm(item) and _norm(item) != "none"]
+
+
+def _encode_row(perfume: Perfume) -> dict:
+    """Parse one perfume row once, every string split happens here"""
+    return {
+        "id": perfume.id,
+        "name": perfume.name,
+        "brand": perfume.brand,
+        "image_url": perfume.image_url,
+        "family": _norm(perfume.fragrance_family),
+        "gender": _norm(perfume.gender_presentation),
+        "season": _norm(perfume.seasonal_focus),
+        "concentration": _norm(perfume.concentration),
+        "price": perfume.price if perfume.price is not None else np.nan,
+        "strength": CONCENTRATION_STRENGTH.get(_norm(perfume.concentration), 1.0),
+        "intensity": INTENSITY_LEVELS.get(_norm(perfume.intensity), 1),
+        "projection": PROJECTION_LEVELS.get(_norm(perfume.projection), 1),
+        "sillage": SILLAGE_LEVELS.get(_norm(perfume.sillage), 1),
+        "longevity": max(perfume.longevity_hours or 0, 1),
+        "tiers": [_split(getattr(perfume, tier)) for tier in TIERS],
+        "allergens": _split(perfume.allergens),
+    }
+
+
+def _grow(vocab: dict, values) -> dict:
+    """Copy of vocab with any unseen values appended, existing columns keep their index"""
+    vocab = dict(vocab)
+    for value in values:
+        if value and value not in vocab:
+            vocab[value] = len(vocab)
+    return vocab
+
+
+def _hot(vocab: dict, values) -> np.ndarray:
+    row = np.zeros(len(vocab), dtype=bool)
+    row[[vocab[value] for value in values if value in vocab]] = True
+    return row
+
+
+class PerfumeFeatureStore:
+    """
+    In-process, array-backed copy of the perfume catalog.
+
+    The snapshot is a dict of contiguous arrays (one row per perfume) plus the
+    vocabularies behind the multi-hot blocks. It is built once at startup and
+    patched row by row when PerfumeService writes, copy-on-write so readers
+    never see a half-applied change. Each worker process holds its own copy.
+    """
+
+    _lock = threading.Lock()
+    _snapshot: dict | None = None
+
+    @classmethod
+    def build(cls) -> dict:
+        """(Re)load the whole catalog from the db"""
+        with get_session() as session:
+            perfumes = session.query(Perfume).order_by(Perfume.id).all()
+            rows = [_encode_row(perfume) for perfume in perfumes]
+
+        with cls._lock:
+            version = cls._snapshot["version"] + 1 if cls._snapshot else 1
+            cls._snapshot = cls._assemble(rows, version)
+            return cls._snapshot
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        """Current catalog arrays, built lazily if startup did not do it"""
+        snapshot = cls._snapshot
+        if snapshot is None:
+            snapshot = cls.build()
+        return snapshot
+
+    @classmethod
+    def upsert(cls, perfume: Perfume) -> None:
+        """Add a new perfume or replace the row of an existing one"""
+        row = _encode_row(perfume)
+        with cls._lock:
+            if cls._snapshot is None:
+                return
+            snapshot = cls._with_vocab(cls._snapshot, row)
+            index = snapshot["row_of"].get(row["id"])
+            if index is None:
+                snapshot = cls._append(snapshot, row)
+            else:
+                snapshot = cls._replace(snapshot, index, row)
+            snapshot["version"] += 1
+            cls._snapshot = snapshot
+
+    @classmethod
+    def remove(cls, perfume_id: int) -> None:
+        with cls._lock:
+            if cls._snapshot is None or perfume_id not in cls._snapshot["row_of"]:
+                return
+            index = cls._snapshot["row_of"][perfume_id]
+            snapshot = dict(cls._snapshot)
+            for key in COLUMNS:
+                value = snapshot[key]
+                if isinstance(value, np.ndarray):
+                    snapshot[key] = np.delete(value, index, axis=0)
+                else:
+                    snapshot[key] = value[:index] + value[index + 1 :]
+            snapshot["row_of"] = {int(pid): i for i, pid in enumerate(snapshot["ids"])}
+            snapshot["features"] = None
+            snapshot["version"] += 1
+            cls._snapshot = snapshot
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._snapshot = None
+
+    @classmethod
+    def take(cls, snapshot: dict, rows: np.ndarray) -> dict:
+        """
+        View of the snapshot restricted to the given rows. It shares the
+        vocabularies but has no version, so it is never cached as a snapshot
+        """
+        view = {"vocab": snapshot["vocab"], "version": None, "features": None}
+        for key in COLUMNS:
+            value = snapshot[key]
+            if isinstance(value, np.ndarray):
+                view[key] = value[rows]
+            else:
+                view[key] = [value[row] for row in rows]
+        view["row_of"] = {int(pid): i for i, pid in enumerate(view["ids"])}
+        return view
+
+    @classmethod
+    def vocab_mask(cls, snapshot: dict, vocabulary: str, terms) -> np.ndarray:
+        """Columns of a vocabulary whose value contains any of the given terms"""
+        terms = [_norm(term) for term in terms if _norm(term)]
+        vocab = snapshot["vocab"][vocabulary]
+        mask = np.zeros(len(vocab), dtype=bool)
+        for value, column in vocab.items():
+            if any(term in value for term in terms):
+                mask[column] = True
+        return mask
+
+    @classmethod
+    def feature_matrix(cls, snapshot: dict) -> np.ndarray:
+        """Row normalised dense features used for similarity, cached on the snapshot"""
+        features = snapshot.get("features")
+        if features is None:
+            notes = (
+                snapshot["top_notes"] | snapshot["middle_notes"] | snapshot["base_notes"]
+            )
+            price = np.nan_to_num(np.log1p(snapshot["price"]), nan=0.0)
+            if price.size and price.max() > 0:
+                price = price / price.max()
+            features = np.hstack(
+                [
+                    notes.astype(np.float32),
+                    2.0 * snapshot["family_onehot"].astype(np.float32),
+                    snapshot["concentration_onehot"].astype(np.float32),
+                    np.stack(
+                        [
+                            snapshot["intensity"] / 2.0,
+                            snapshot["projection"] / 2.0,
+                            snapshot["sillage"] / 2.0,
+                            price,
+                        ],
+                        axis=1,
+                    ).astype(np.float32),
+                ]
+            )
+            norms = np.linalg.norm(features, axis=1, keepdims=True)
+            features = features / np.maximum(norms, 1e-9)
+            snapshot["features"] = features
+        return features
+
+    @classmethod
+    def similar(cls, perfume_id: int, limit: int = 5) -> list[dict]:
+        """Perfumes closest to the given one by cosine similarity of their features"""
+        snapshot = cls.snapshot()
+        index = snapshot["row_of"].get(perfume_id)
+        if index is None:
+            return []
+
+        features = cls.feature_matrix(snapshot)
+        similarity = features @ features[index]
+        similarity[index] = -np.inf
+
+        limit = min(limit, len(similarity) - 1)
+        if limit <= 0:
+            return []
+        top = np.argpartition(-similarity, limit - 1)[:limit]
+        top = top[np.argsort(-similarity[top])]
+        return [
+            {
+                "perfume_id": int(snapshot["ids"][row]),
+                "name": snapshot["names"][row],
+                "brand": snapshot["brands"][row],
+                "similarity": round(float(similarity[row]), 4),
+            }
+            for row in top
+        ]
+
+    # ---------------------------------------------------------------- internals
+
+    @classmethod
+    def _assemble(cls, rows: list[dict], version: int) -> dict:
+        vocab = {name: {} for name in VOCABULARIES}
+        for row in rows:
+            vocab["notes"] = _grow(vocab["notes"], sum(row["tiers"], []))
+            vocab["families"] = _grow(vocab["families"], [row["family"]])
+            vocab["concentrations"] = _grow(
+                vocab["concentrations"], [row["concentration"]]
+            )
+            vocab["allergens"] = _grow(vocab["allergens"], row["allergens"])
+
+        snapshot = {"vocab": vocab, "version": version, "features": None}
+        columns = [cls._columns(vocab, row) for row in rows]
+        for key, dtype in COLUMNS.items():
+            values = [column[key] for column in columns]
+            if dtype is list:
+                snapshot[key] = values
+            elif key in MATRICES:
+                width = len(vocab[MATRICES[key]])
+                snapshot[key] = np.array(values, dtype=bool).reshape(len(rows), width)
+            elif key == "note_counts":
+                snapshot[key] = np.array(values, dtype=float).reshape(len(rows), 3)
+            else:
+                snapshot[key] = np.array(values, dtype=dtype)
+        snapshot["row_of"] = {int(pid): i for i, pid in enumerate(snapshot["ids"])}
+        return snapshot
+
+    @classmethod
+    def _columns(cls, vocab: dict, row: dict) -> dict:
+        return {
+            "ids": row["id"],
+            "names": row["name"],
+            "brands": row["brand"],
+            "image_urls": row["image_url"],
+            "families": row["family"],
+            "genders": row["gender"],
+            "seasons": row["season"],
+            "price": row["price"],
+            "strength": row["strength"],
+            "intensity": row["intensity"],
+            "projection": row["projection"],
+            "sillage": row["sillage"],
+            "longevity": row["longevity"],
+            "note_counts": [len(tier) for tier in row["tiers"]],
+            "top_notes": _hot(vocab["notes"], row["tiers"][0]),
+            "middle_notes": _hot(vocab["notes"], row["tiers"][1]),
+            "base_notes": _hot(vocab["notes"], row["tiers"][2]),
+            "family_onehot": _hot(vocab["families"], [row["family"]]),
+            "concentration_onehot": _hot(
+                vocab["concentrations"], [row["concentration"]]
+            ),
+            "allergen_matrix": _hot(vocab["allergens"], row["allergens"]),
+        }
+
+    @classmethod
+    def _with_vocab(cls, snapshot: dict, row: dict) -> dict:
+        """Shallow copy of the snapshot with vocabularies (and matrix widths) grown for row"""
+        vocab = {
+            "notes": _grow(snapshot["vocab"]["notes"], sum(row["tiers"], [])),
+            "families": _grow(snapshot["vocab"]["families"], [row["family"]]),
+            "concentrations": _grow(
+                snapshot["vocab"]["concentrations"], [row["concentration"]]
+            ),
+            "allergens": _grow(snapshot["vocab"]["allergens"], row["allergens"]),
+        }
+        snapshot = dict(snapshot)
+        for key, name in MATRICES.items():
+            extra = len(vocab[name]) - snapshot[key].shape[1]
+            if extra:
+                snapshot[key] = np.pad(snapshot[key], ((0, 0), (0, extra)))
+        snapshot["vocab"] = vocab
+        snapshot["features"] = None
+        return snapshot
+
+    @classmethod
+    def _append(cls, snapshot: dict, row: dict) -> dict:
+        columns = cls._columns(snapshot["vocab"], row)
+        for key, value in columns.items():
+            current = snapshot[key]
+            if isinstance(current, list):
+                snapshot[key] = current + [value]
+            else:
+                value = np.asarray(value, dtype=current.dtype).reshape(
+                    (1,) + current.shape[1:]
+                )
+                snapshot[key] = np.concatenate([current, value], axis=0)
+        snapshot["row_of"] = dict(snapshot["row_of"])
+        snapshot["row_of"][row["id"]] = len(snapshot["ids"]) - 1
+        return snapshot
+
+    @classmethod
+    def _replace(cls, snapshot: dict, index: int, row: dict) -> dict:
+        columns = cls._columns(snapshot["vocab"], row)
+        for key, value in columns.items():
+            current = snapshot[key]
+            if isinstance(current, list):
+                current = list(current)
+                current[index] = value
+            else:
+                current = current.copy()
+                current[index] = value
+            snapshot[key] = current
+        return snapshot
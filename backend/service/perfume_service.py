@@ -1,7 +1,14 @@
 from db.core import get_session
+from db.async_core import get_async_session
 from db.models import Perfume
 from schema.perfume_schema import PerfumeSchema
 from schema.response_schema import APIResponse
+from service.pagination import page_response, apage_response, DEFAULT_PAGE_SIZE
+from service.perfume_feature_store import PerfumeFeatureStore
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
 
 
 class PerfumeService:
@@ -18,6 +25,7 @@ class PerfumeService:
                 session.add(perfume_item)
                 session.commit()
                 session.refresh(perfume_item)
+                PerfumeFeatureStore.upsert(perfume_item)
                 return APIResponse(
                     success=True, message=f"Created perfume successfully"
                 )
@@ -50,10 +58,10 @@ class PerfumeService:
                 perfume_to_update.fragrance_family = perfume.fragrance_family
                 perfume_to_update.gender_presentation = perfume.gender_presentation
                 perfume_to_update.projection = perfume.projection
-                perfume_to_update.sillage = perfume.silage
+                perfume_to_update.sillage = perfume.sillage
                 perfume_to_update.top_notes = perfume.top_notes
                 perfume_to_update.middle_notes = perfume.middle_notes
-                perfume_to_update.base_notes = perfume.base_nodes
+                perfume_to_update.base_notes = perfume.base_notes
                 perfume_to_update.seasonal_focus = perfume.seasonal_focus
                 perfume_to_update.allergens = perfume.allergens
                 perfume_to_update.image_url = perfume.image_url
@@ -62,6 +70,7 @@ class PerfumeService:
 
                 session.add(perfume_to_update)
                 session.commit()
+                PerfumeFeatureStore.upsert(perfume_to_update)
 
                 return APIResponse(
                     success=True,
@@ -89,6 +98,7 @@ class PerfumeService:
 
                     session.delete(perfume_to_delete)
                     session.commit()
+                    PerfumeFeatureStore.remove(perfume_id)
                     return APIResponse(
                         success=True,
                         message=f"Perfume with id: {perfume_id} deleted successfully",
@@ -118,14 +128,118 @@ class PerfumeService:
             return APIResponse(success=True, message="Found perfume", data=[perfume])
 
     @classmethod
-    def get_perfume_all(cls) -> APIResponse:
+    def get_perfume_all(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
         """
-        Read all perfumes
+        Read one page of perfumes, newest first
         """
         with get_session() as session:
+            return page_response(session.query(Perfume), Perfume, cursor, limit)
+
+    @classmethod
+    def get_similar_perfumes(cls, perfume_id: int, limit: int = 5) -> APIResponse:
+        """
+        Perfumes closest to the given one, answered from the feature store
+        """
+        similar = PerfumeFeatureStore.similar(perfume_id, limit)
+        if not similar:
+            return APIResponse(
+                status_code=404,
+                success=False,
+                message=f"Cannot find perfumes similar to id: {perfume_id}",
+            )
+        return APIResponse(success=True, message="Found similar perfumes", data=similar)
+
+    # async variants, same responses as the sync methods above
+
+    @classmethod
+    async def acreate_perfume(cls, perfume: PerfumeSchema) -> APIResponse:
+        async with get_async_session() as session:
+            try:
+                perfume_item = Perfume(**perfume.dict())
+                session.add(perfume_item)
+                await session.commit()
+                await session.refresh(perfume_item)
+                PerfumeFeatureStore.upsert(perfume_item)
+                return APIResponse(
+                    success=True, message=f"Created perfume successfully"
+                )
+            except Exception as e:
+                logger.exception("Failed to create perfume")
+                return APIResponse(
+                    status_code=500, success=False, message="Failed to create perfume"
+                )
+
+    @classmethod
+    async def aupdate_perfume(cls, perfume_id: int, perfume: PerfumeSchema) -> APIResponse:
+        async with get_async_session() as session:
+            perfume_to_update = await session.get(Perfume, perfume_id)
+
+            if not perfume_to_update:
+                return APIResponse(
+                    status_code=404,
+                    success=False,
+                    message=f"Cannot find perfume with id: {perfume_id}",
+                )
+
+            for field, value in perfume.dict().items():
+                setattr(perfume_to_update, field, value)
+            await session.commit()
+            PerfumeFeatureStore.upsert(perfume_to_update)
+
+            return APIResponse(
+                success=True,
+                message=f"Perfume with id {perfume_id} updated successfully",
+            )
 
-            perfumes = session.query(Perfume).all()
-            return APIResponse(success=True, message="All good", data=perfumes)
+    @classmethod
+    async def adelete_perfume(cls, perfume_id: int) -> APIResponse:
+        async with get_async_session() as session:
+            perfume_to_delete = await session.get(Perfume, perfume_id)
+
+            if not perfume_to_delete:
+                return APIResponse(
+                    status_code=404,
+                    success=False,
+                    message=f"Cannot find perfume with id: {perfume_id}",
+                )
+
+            try:
+                await session.delete(perfume_to_delete)
+                await session.commit()
+                PerfumeFeatureStore.remove(perfume_id)
+                return APIResponse(
+                    success=True,
+                    message=f"Perfume with id: {perfume_id} deleted successfully",
+                )
+            except Exception as e:
+                logger.exception("Failed to delete perfume")
+                return APIResponse(
+                    status_code=500,
+                    success=False,
+                    message=f"Failed to delete perfume with id: {perfume_id}",
+                )
+
+    @classmethod
+    async def aget_perfume_by_id(cls, perfume_id: int) -> APIResponse:
+        async with get_async_session() as session:
+            perfume = await session.get(Perfume, perfume_id)
+
+            if not perfume:
+                return APIResponse(
+                    status_code=404,
+                    success=False,
+                    message=f"Cannot find perfume with id: {perfume_id}",
+                )
+            return APIResponse(success=True, message="Found perfume", data=[perfume])
+
+    @classmethod
+    async def aget_perfume_all(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
+        async with get_async_session() as session:
+            return await apage_response(session, Perfume, cursor, limit)
 
     # DANGEROUS OPERATION::::: DON'T TRY!!!!!!!
     @classmethod
@@ -134,6 +248,7 @@ class PerfumeService:
             try:
                 session.query(Perfume).delete()
                 session.commit()
+                PerfumeFeatureStore.build()
                 return APIResponse(success=True, message="Deleted all perfumes <:")
             except:
                 return APIResponse(
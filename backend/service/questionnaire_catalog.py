@@ -0,0 +1,100 @@
+from db.core import get_session
+from db.models import Questionnaire
+from fastapi.encoders import jsonable_encoder
+import hashlib
+import json
+import threading
+
+
+def _row(question: Questionnaire) -> dict:
+    # the columns as the endpoint always returned them, multiple_choices unsplit
+    return {
+        column.name: getattr(question, column.name)
+        for column in Questionnaire.__table__.columns
+    }
+
+
+class QuestionnaireCatalog:
+    """
+    In-process snapshot of the question set, which only changes when
+    questions are written through QuestionnaireService (it calls
+    invalidate()). The GET /questionnaires/questions/ body is serialized
+    once per version, its strong ETag is a hash of those bytes so every
+    worker and restart agrees on it.
+
+    Snapshots are never mutated, a write drops the current one and the next
+    read builds a new version.
+    """
+
+    _lock = threading.Lock()
+    _snapshot: dict | None = None
+    _version = 0
+    stats = {"builds": 0, "hits": 0, "not_modified": 0}
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        """{"version", "etag", "body", "question_ids", "count"}"""
+        snapshot = cls._snapshot
+        if snapshot is not None:
+            cls.stats["hits"] += 1
+            return snapshot
+
+        with cls._lock:
+            if cls._snapshot is None:
+                cls._snapshot = cls._build()
+            return cls._snapshot
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._snapshot = None
+
+    @classmethod
+    def count_not_modified(cls) -> None:
+        cls.stats["not_modified"] += 1
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        snapshot = cls._snapshot
+        return {
+            **cls.stats,
+            "version": snapshot["version"] if snapshot else None,
+            "etag": snapshot["etag"] if snapshot else None,
+            "questions": snapshot["count"] if snapshot else None,
+            "bytes": len(snapshot["body"]) if snapshot else None,
+        }
+
+    @classmethod
+    def _build(cls) -> dict:
+        with get_session() as session:
+            questions = session.query(Questionnaire).order_by(Questionnaire.id).all()
+            rows = [_row(question) for question in questions]
+
+        body = json.dumps(
+            {"success": True, "message": "All good", "data": jsonable_encoder(rows)},
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode()
+        cls._version += 1
+        cls.stats["builds"] += 1
+        return {
+            "version": cls._version,
+            "etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            "body": body,
+            "question_ids": frozenset(
+                row["question_id"] for row in rows if row["question_id"] is not None
+            ),
+            "count": len(rows),
+        }
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check, weak comparison as RFC 9110 asks for GET"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
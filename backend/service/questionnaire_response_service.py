@@ -1,7 +1,17 @@
 from db.core import get_session
 from db.models import QuestionnaireResponse
-from schema.questionnaire_response_schema import QuestionnaireResponseSchema
+from schema.questionnaire_response_schema import (
+    QuestionnaireResponseSchema,
+    QuestionnaireBulkResponseSchema,
+)
 from schema.response_schema import APIResponse
+from service.questionnaire_service import QuestionnaireService
+from sqlalchemy import delete, insert
+from service.pagination import page_response, DEFAULT_PAGE_SIZE
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
 
 
 class QuestionnaireResponseService:
@@ -13,9 +23,6 @@ class QuestionnaireResponseService:
         with get_session() as session:
 
             try:
-                print("+++++++++++++++++++++++++++++++++++++++++")
-                print("creating questionnnaire response")
-
                 questionnaire_item = QuestionnaireResponse(
                     **questionnaire_response.dict()
                 )
@@ -23,12 +30,11 @@ class QuestionnaireResponseService:
                 session.commit()
                 session.refresh(questionnaire_item)
 
-                print("Response saved")
                 return APIResponse(
                     success=True, message="Questionnaire response saved successfully"
                 )
             except Exception as e:
-                print("Something went wrong", e)
+                logger.exception("Failed to save questionnaire response")
 
                 return APIResponse(
                     status_code=500,
@@ -36,6 +42,53 @@ class QuestionnaireResponseService:
                     message="Failed to create questionnaire response",
                 )
 
+    @classmethod
+    def create_questionnaire_responses_bulk(
+        cls, bulk: QuestionnaireBulkResponseSchema
+    ) -> APIResponse:
+        """
+        Save every answer of a user in one transaction. An answer replaces the
+        user's earlier answer to the same question, the last one wins when a
+        question is answered twice in the payload
+        """
+        answers = {answer.question_id: answer for answer in bulk.answers}
+
+        unknown = QuestionnaireService.unknown_question_ids(answers.keys())
+        if unknown:
+            return APIResponse(
+                status_code=400,
+                success=False,
+                message=f"Unknown question ids: {', '.join(sorted(unknown))}",
+            )
+
+        rows = [
+            {"user_id": bulk.user_id, **answer.dict()} for answer in answers.values()
+        ]
+        with get_session() as session:
+            try:
+                session.execute(
+                    delete(QuestionnaireResponse)
+                    .where(QuestionnaireResponse.user_id == bulk.user_id)
+                    .where(QuestionnaireResponse.question_id.in_(answers.keys()))
+                )
+                # core insert on the table: one executemany, the ORM bulk path
+                # would split rows by which answer columns are null
+                session.execute(insert(QuestionnaireResponse.__table__), rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.exception("Failed to save questionnaire responses")
+                return APIResponse(
+                    status_code=500,
+                    success=False,
+                    message="Failed to save questionnaire responses",
+                )
+
+        return APIResponse(
+            success=True,
+            message=f"Saved {len(rows)} questionnaire responses successfully",
+        )
+
     @classmethod
     def update_questionnaire_response(
         cls, qr_id, questionnaire_response: QuestionnaireResponseSchema
@@ -109,13 +162,16 @@ class QuestionnaireResponseService:
                 )
 
     @classmethod
-    def get_questionnaire_respones_all(cls) -> APIResponse:
+    def get_questionnaire_respones_all(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
         with get_session() as session:
-            db_qn_responses = session.query(QuestionnaireResponse).all()
-
-            if not db_qn_responses:
-                db_qn_responses = []
-            return APIResponse(success=True, message="All good", data=db_qn_responses)
+            return page_response(
+                session.query(QuestionnaireResponse),
+                QuestionnaireResponse,
+                cursor,
+                limit,
+            )
 
     # DANGEROUS OPERATIONV===> DONT'T ATTEMPT !!
     @classmethod
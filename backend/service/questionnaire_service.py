@@ -2,9 +2,41 @@ from db.core import get_session
 from db.models import Questionnaire
 from schema.questionnaire_schema import QuestionnaireSchema
 from schema.response_schema import APIResponse
+from service.questionnaire_catalog import QuestionnaireCatalog, etag_matches
 
 
 class QuestionnaireService:
+    @classmethod
+    def question_ids(cls) -> frozenset:
+        """ids answers are checked against, from the cached catalog"""
+        return QuestionnaireCatalog.snapshot()["question_ids"]
+
+    @classmethod
+    def unknown_question_ids(cls, question_ids) -> set:
+        """
+        The given ids that are not questions. Checked against the cached
+        catalog, ids it does not know are looked up with one IN query and the
+        catalog is only rebuilt when that finds some (written behind its back)
+        """
+        unknown = set(question_ids) - cls.question_ids()
+        if not unknown:
+            return unknown
+
+        with get_session() as session:
+            found = {
+                row.question_id
+                for row in session.query(Questionnaire.question_id).filter(
+                    Questionnaire.question_id.in_(unknown)
+                )
+            }
+        if found:
+            cls.invalidate()
+        return unknown - found
+
+    @classmethod
+    def invalidate(cls) -> None:
+        QuestionnaireCatalog.invalidate()
+
     @classmethod
     def create_questionnaire(cls, questionnaire: QuestionnaireSchema) -> APIResponse:
         with get_session() as session:
@@ -15,6 +47,7 @@ class QuestionnaireService:
                 session.add(db_qn)
                 session.commit()
                 session.refresh(db_qn)
+                cls.invalidate()
                 return APIResponse(
                     success=True, message="Questionnaire saved successfully"
                 )
@@ -47,6 +80,7 @@ class QuestionnaireService:
 
                 session.add(db_qn)
                 session.commit()
+                cls.invalidate()
                 return APIResponse(
                     success=True, message="Questionnaire updated successfully"
                 )
@@ -68,6 +102,7 @@ class QuestionnaireService:
                 try:
                     session.delete(db_qn)
                     session.commit()
+                    cls.invalidate()
                     return APIResponse(
                         success=True,
                         message=f"Questionnaire with id: {q_id} deleted succesfully",
@@ -96,6 +131,28 @@ class QuestionnaireService:
                     success=True, message="Found questionnaire", data=[db_qn]
                 )
 
+    @classmethod
+    def get_questionnaires_catalog(
+        cls, if_none_match: str | None = None
+    ) -> tuple[dict, bool]:
+        """
+        Pre-serialized body and ETag of get_questionnaires_all, no db access
+        once built. The flag says the client already has this version
+        """
+        catalog = QuestionnaireCatalog.snapshot()
+        not_modified = etag_matches(if_none_match, catalog["etag"])
+        if not_modified:
+            QuestionnaireCatalog.count_not_modified()
+        return catalog, not_modified
+
+    @classmethod
+    def get_catalog_stats(cls) -> APIResponse:
+        return APIResponse(
+            success=True,
+            message="Questionnaire catalog stats",
+            data=[QuestionnaireCatalog.get_stats()],
+        )
+
     @classmethod
     def get_questionnaires_all(cls) -> APIResponse:
         with get_session() as session:
@@ -0,0 +1,194 @@
+from collections import OrderedDict
+from service.perfume_feature_store import PerfumeFeatureStore
+from service.simulation_service import temperature_bucket, humidity_bucket
+from starlette.concurrency import run_in_threadpool
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+# optional second level that survives restarts, e.g. ./ai_cache.db
+CACHE_SQLITE_PATH = os.getenv("AI_CACHE_SQLITE_PATH")
+
+# profile fields that identify the row, not the person's preferences
+IGNORED_PROFILE_FIELDS = ("id", "user_id", "created_at")
+
+
+def _canonical(value):
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, (list, tuple)):
+        return sorted(_canonical(item) for item in value if item)
+    return value
+
+
+class RecommendationCache:
+    """
+    TTL + LRU cache of AI recommendation responses.
+
+    Keys are a hash of the normalized profile fields plus the request context
+    (temperature and humidity bucketed like the questionnaire) and the catalog
+    version, so users with the same profile share entries and a catalog write
+    never serves a perfume that is gone. A profile update needs no
+    invalidation, the changed profile hashes to a new key and the old entry
+    ages out through the TTL / LRU.
+
+    With AI_CACHE_SQLITE_PATH set, misses fall through to a sqlite file; async
+    callers use aget / aset so that file IO runs in the threadpool.
+    """
+
+    _lock = threading.Lock()
+    _db_lock = threading.Lock()
+    _entries: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+    _db: sqlite3.Connection | None = None
+    stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @classmethod
+    def key(cls, user_profile: dict, context: dict) -> str:
+        profile = {
+            field: _canonical(value)
+            for field, value in user_profile.items()
+            if field not in IGNORED_PROFILE_FIELDS
+        }
+        context = {
+            "mood": _canonical(context.get("mood")),
+            "activity": _canonical(context.get("activity")),
+            "primary_climate": _canonical(context.get("primary_climate")),
+            "temperature": temperature_bucket(float(context.get("temperature") or 20)),
+            "humidity": humidity_bucket(float(context.get("humidity") or 50)),
+        }
+        catalog_version = PerfumeFeatureStore.snapshot()["version"]
+        raw = json.dumps(
+            {"profile": profile, "context": context, "catalog": catalog_version},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> dict | None:
+        now = time.time()
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    cls._entries.move_to_end(key)
+                    cls.stats["hits"] += 1
+                    return copy.deepcopy(value)
+                del cls._entries[key]
+                cls.stats["expired"] += 1
+
+        value = cls._db_get(key, now)
+        with cls._lock:
+            if value is not None:
+                cls._store(key, value, now + CACHE_TTL_SECONDS)
+                cls.stats["hits"] += 1
+                return copy.deepcopy(value)
+            cls.stats["misses"] += 1
+            return None
+
+    @classmethod
+    def set(cls, key: str, value: dict) -> None:
+        expires_at = time.time() + CACHE_TTL_SECONDS
+        value = copy.deepcopy(value)
+        with cls._lock:
+            cls._store(key, value, expires_at)
+        cls._db_set(key, value, expires_at)
+
+    @classmethod
+    async def aget(cls, key: str) -> dict | None:
+        if CACHE_SQLITE_PATH:
+            return await run_in_threadpool(cls.get, key)
+        return cls.get(key)
+
+    @classmethod
+    async def aset(cls, key: str, value: dict) -> None:
+        if CACHE_SQLITE_PATH:
+            await run_in_threadpool(cls.set, key, value)
+        else:
+            cls.set(key, value)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+        with cls._db_lock:
+            db = cls._connection()
+            if db is not None:
+                db.execute("DELETE FROM ai_cache")
+                db.commit()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._lock:
+            lookups = cls.stats["hits"] + cls.stats["misses"]
+            return {
+                **cls.stats,
+                "size": len(cls._entries),
+                "max_size": CACHE_SIZE,
+                "ttl_seconds": CACHE_TTL_SECONDS,
+                "hit_ratio": round(cls.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "sqlite": bool(CACHE_SQLITE_PATH),
+            }
+
+    # ---------------------------------------------------------------- internals
+
+    @classmethod
+    def _store(cls, key: str, value: dict, expires_at: float) -> None:
+        cls._entries[key] = (expires_at, value)
+        cls._entries.move_to_end(key)
+        while len(cls._entries) > CACHE_SIZE:
+            cls._entries.popitem(last=False)
+            cls.stats["evictions"] += 1
+
+    @classmethod
+    def _connection(cls) -> sqlite3.Connection | None:
+        """The sqlite level, callers hold _db_lock"""
+        if not CACHE_SQLITE_PATH:
+            return None
+        if cls._db is None:
+            cls._db = sqlite3.connect(CACHE_SQLITE_PATH, check_same_thread=False)
+            cls._db.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+            cls._db.commit()
+        return cls._db
+
+    @classmethod
+    def _db_get(cls, key: str, now: float) -> dict | None:
+        with cls._db_lock:
+            db = cls._connection()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT value, expires_at FROM ai_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                db.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                db.commit()
+                with cls._lock:
+                    cls.stats["expired"] += 1
+                return None
+            return json.loads(row[0])
+
+    @classmethod
+    def _db_set(cls, key: str, value: dict, expires_at: float) -> None:
+        with cls._db_lock:
+            db = cls._connection()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO ai_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), expires_at),
+            )
+            db.commit()
@@ -1,9 +1,17 @@
 from db.core import get_session
+from db.async_core import get_async_session, use_async_session, acommit_or_flush
 from db.models import Recommendation
 from schema.recommendation_schema import RecommendationSchema
 from schema.response_schema import APIResponse
+from service.pagination import page_response, apage_response, DEFAULT_PAGE_SIZE
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 from datetime import datetime
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
 
 
 class RecommendationService:
@@ -25,11 +33,7 @@ class RecommendationService:
                 # Check for duplicate recommendations (same perfume, same user, recent creation)
                 duplicate_check = (
                     session.query(Recommendation)
-                    .filter(
-                        Recommendation.user_id == user_id,
-                        Recommendation.ai_perfume_name == recommendation_data.get("perfume"),
-                        Recommendation.created_at > datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)  # Today
-                    )
+                    .filter(*cls.same_day_filter(user_id, recommendation_data))
                     .first()
                 )
 
@@ -41,30 +45,17 @@ class RecommendationService:
                     )
 
                 # Create new recommendation for AI-generated content
-                db_rec = Recommendation(
-                    user_id=user_id,
-                    ai_perfume_name=recommendation_data.get("perfume"),
-                    reason=recommendation_data.get("reason"),
-                    price=recommendation_data.get("price"),
-                    image_url=recommendation_data.get("image_url"),
-                    predicted_longevity=recommendation_data.get("predicted_longevity"),
-                    predicted_projection=recommendation_data.get("predicted_projection"),
-                    predicted_sillage=recommendation_data.get("predicted_sillage"),
-                    predicted_pleasantness=recommendation_data.get("predicted_pleasantness"),
-                    utility_score=recommendation_data.get("utility_score"),
-                    other_perfumes_to_try=recommendation_data.get("other_perfumes_to_try"),
-                    context_mood=recommendation_data.get("context_mood"),
-                    context_activity=recommendation_data.get("context_activity"),
-                    context_temperature=recommendation_data.get("context_temperature"),
-                    context_humidity=recommendation_data.get("context_humidity")
-                )
+                db_rec = cls.ai_recommendation_row(user_id, recommendation_data)
 
                 session.add(db_rec)
                 session.commit()
                 session.refresh(db_rec)
 
                 # Log successful creation
-                print(f"✅ AI Recommendation saved successfully for user {user_id}: {db_rec.ai_perfume_name}")
+                logger.info(
+                    "AI recommendation saved",
+                    extra={"user_id": user_id, "perfume": db_rec.ai_perfume_name},
+                )
 
                 return APIResponse(
                     success=True,
@@ -73,13 +64,45 @@ class RecommendationService:
                 )
             except Exception as e:
                 session.rollback()
-                print(f"❌ Failed to create AI recommendation for user {user_id}: {str(e)}")
+                logger.exception(
+                    "Failed to create AI recommendation", extra={"user_id": user_id}
+                )
                 return APIResponse(
                     status_code=500,
                     success=False,
                     message=f"Failed to create AI recommendation: {str(e)}"
                 )
 
+    @classmethod
+    def same_day_filter(cls, user_id: int, recommendation_data: dict) -> tuple:
+        """Same perfume for the same user created today"""
+        return (
+            Recommendation.user_id == user_id,
+            Recommendation.ai_perfume_name == recommendation_data.get("perfume"),
+            Recommendation.created_at > datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
+        )
+
+    @classmethod
+    def ai_recommendation_row(cls, user_id: int, recommendation_data: dict) -> Recommendation:
+        return Recommendation(
+            user_id=user_id,
+            perfume_id=recommendation_data.get("perfume_id"),
+            ai_perfume_name=recommendation_data.get("perfume"),
+            reason=recommendation_data.get("reason"),
+            price=recommendation_data.get("price"),
+            image_url=recommendation_data.get("image_url"),
+            predicted_longevity=recommendation_data.get("predicted_longevity"),
+            predicted_projection=recommendation_data.get("predicted_projection"),
+            predicted_sillage=recommendation_data.get("predicted_sillage"),
+            predicted_pleasantness=recommendation_data.get("predicted_pleasantness"),
+            utility_score=recommendation_data.get("utility_score"),
+            other_perfumes_to_try=recommendation_data.get("other_perfumes_to_try"),
+            context_mood=recommendation_data.get("context_mood"),
+            context_activity=recommendation_data.get("context_activity"),
+            context_temperature=recommendation_data.get("context_temperature"),
+            context_humidity=recommendation_data.get("context_humidity"),
+        )
+
     @classmethod
     def get_user_recommendations(cls, user_id: int, limit: int = 10) -> APIResponse:
         """Get user's recommendation history"""
@@ -225,10 +248,137 @@ class RecommendationService:
                 )
 
     @classmethod
-    def get_recommendation_all(cls) -> APIResponse:
-        """Get all recommendations"""
+    def get_recommendation_all(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
+        """Get one page of recommendations, newest first"""
         with get_session() as session:
-            db_recs = session.query(Recommendation).all()
-            if not db_recs:
-                db_recs = []
-            return APIResponse(success=True, message="All good", data=db_recs)
+            return page_response(
+                session.query(Recommendation), Recommendation, cursor, limit
+            )
+
+    # async variants, same responses as the sync methods above
+
+    @classmethod
+    async def acreate_ai_recommendation(
+        cls, user_id: int, recommendation_data: dict, session: AsyncSession | None = None
+    ) -> APIResponse:
+        async with use_async_session(session) as session:
+            try:
+                for field in ['perfume', 'reason']:
+                    if not recommendation_data.get(field):
+                        return APIResponse(
+                            status_code=400,
+                            success=False,
+                            message=f"Missing required field: {field}"
+                        )
+
+                duplicate_check = await session.scalar(
+                    select(Recommendation)
+                    .filter(*cls.same_day_filter(user_id, recommendation_data))
+                    .limit(1)
+                )
+                if duplicate_check:
+                    return APIResponse(
+                        success=True,
+                        message="Similar recommendation already exists for today",
+                        data=[duplicate_check]
+                    )
+
+                db_rec = cls.ai_recommendation_row(user_id, recommendation_data)
+                session.add(db_rec)
+                await acommit_or_flush(session)
+                await session.refresh(db_rec)
+
+                logger.info(
+                    "AI recommendation saved",
+                    extra={"user_id": user_id, "perfume": db_rec.ai_perfume_name},
+                )
+
+                return APIResponse(
+                    success=True,
+                    message="AI Recommendation created successfully",
+                    data=[db_rec]
+                )
+            except Exception as e:
+                await session.rollback()
+                logger.exception(
+                    "Failed to create AI recommendation", extra={"user_id": user_id}
+                )
+                return APIResponse(
+                    status_code=500,
+                    success=False,
+                    message=f"Failed to create AI recommendation: {str(e)}"
+                )
+
+    @classmethod
+    async def aget_user_recommendations(cls, user_id: int, limit: int = 10) -> APIResponse:
+        async with get_async_session() as session:
+            try:
+                recommendations = await session.scalars(
+                    select(Recommendation)
+                    .filter(Recommendation.user_id == user_id)
+                    .order_by(Recommendation.created_at.desc())
+                    .limit(limit)
+                )
+                return APIResponse(
+                    success=True,
+                    message="Recommendations retrieved successfully",
+                    data=recommendations.all()
+                )
+            except Exception as e:
+                return APIResponse(
+                    success=False,
+                    message=f"Failed to get recommendations: {str(e)}"
+                )
+
+    @classmethod
+    async def aget_latest_ai_recommendation(cls, user_id: int) -> APIResponse:
+        async with get_async_session() as session:
+            try:
+                recommendation = await session.scalar(
+                    select(Recommendation)
+                    .filter(
+                        Recommendation.user_id == user_id,
+                        Recommendation.ai_perfume_name.isnot(None)
+                    )
+                    .order_by(Recommendation.created_at.desc())
+                    .limit(1)
+                )
+
+                if recommendation:
+                    return APIResponse(
+                        success=True,
+                        message="Latest AI recommendation retrieved successfully",
+                        data=[recommendation]
+                    )
+                return APIResponse(
+                    success=False,
+                    message="No AI recommendations found for this user"
+                )
+            except Exception as e:
+                return APIResponse(
+                    success=False,
+                    message=f"Failed to get latest AI recommendation: {str(e)}"
+                )
+
+    @classmethod
+    async def aget_recommendation_by_id(cls, rec_id: int) -> APIResponse:
+        async with get_async_session() as session:
+            db_rec = await session.get(Recommendation, rec_id)
+            if not db_rec:
+                return APIResponse(
+                    status_code=404,
+                    success=False,
+                    message=f"Cannot find recommendation with id: {rec_id}",
+                )
+            return APIResponse(
+                success=True, message="Found recommendation", data=[db_rec]
+            )
+
+    @classmethod
+    async def aget_recommendation_all(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
+        async with get_async_session() as session:
+            return await apage_response(session, Recommendation, cursor, limit)
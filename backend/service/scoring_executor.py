@@ -0,0 +1,208 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from service.perfume_feature_store import PerfumeFeatureStore, COLUMNS
+from service.scoring_service import ScoringService
+from types import SimpleNamespace
+import atexit
+import json
+import multiprocessing
+import numpy as np
+import os
+import shutil
+import tempfile
+import threading
+import time
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", str(os.cpu_count() or 1)))
+# users per task and number of catalog slices, a task scores one block of the matrix
+SCORING_SHARD_SIZE = int(os.getenv("SCORING_SHARD_SIZE", "256"))
+SCORING_CATALOG_SHARDS = int(os.getenv("SCORING_CATALOG_SHARDS", "1"))
+# spawn keeps workers clear of the server's threads and open db connections
+SCORING_START_METHOD = os.getenv("SCORING_START_METHOD", "spawn")
+
+# snapshots loaded by this worker process, keyed by export directory
+_worker_snapshots: dict[str, dict] = {}
+
+
+def _load_snapshot(path: str) -> dict:
+    """Memory-map an exported snapshot, every worker shares the same pages"""
+    snapshot = _worker_snapshots.get(path)
+    if snapshot is None:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        snapshot = {"vocab": meta["vocab"], "version": meta["version"], "features": None}
+        for key in meta["columns"]:
+            snapshot[key] = np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")
+        snapshot["row_of"] = {int(pid): i for i, pid in enumerate(snapshot["ids"])}
+        _worker_snapshots.clear()
+        _worker_snapshots[path] = snapshot
+    return snapshot
+
+
+def _score_shard(
+    path: str,
+    profiles: list[dict],
+    context: dict | None,
+    limit: int,
+    row_range: tuple[int, int],
+) -> dict:
+    """Worker entry point: rank one block of users against one slice of the catalog"""
+    start = time.perf_counter()
+    snapshot = _load_snapshot(path)
+    ranked = {
+        profile["user_id"]: ScoringService.top_rows(
+            snapshot, SimpleNamespace(**profile), context, limit, row_range
+        )
+        for profile in profiles
+    }
+    return {
+        "ranked": ranked,
+        "users": len(profiles),
+        "rows": row_range[1] - row_range[0],
+        "seconds": round(time.perf_counter() - start, 4),
+        "pid": os.getpid(),
+    }
+
+
+class ScoringExecutor:
+    """
+    Shards the user x perfume scoring matrix across a ProcessPoolExecutor.
+
+    The numeric and string columns of the catalog snapshot are written once
+    per version as .npy files and memory-mapped by the workers, so only the
+    profiles and the (row, scores) results cross the process boundary. Each
+    task ranks a block of users against a slice of catalog rows; the per
+    slice top-k lists are merged here into the final ranking.
+
+    The pool has a fixed SCORING_WORKERS processes shared by every caller,
+    a call's workers only caps how many of its shards are queued at once.
+    """
+
+    _lock = threading.Lock()
+    _pool: ProcessPoolExecutor | None = None
+    _export_root: str | None = None
+    _exported: tuple | None = None  # (version, path)
+
+    @classmethod
+    def rank_many(
+        cls,
+        profiles: list,
+        context: dict | None = None,
+        limit: int = 4,
+        workers: int | None = None,
+    ) -> tuple[dict, list[dict]]:
+        """
+        Rank every profile, returns ({user_id: ranked list}, per shard timings).
+        The ranked lists are the same dicts ScoringService.rank returns
+        """
+        snapshot = PerfumeFeatureStore.snapshot()
+        path = cls.export(snapshot)
+        pool = cls.pool()
+        # shards this call keeps in the pool at once, never more than it has
+        workers = max(1, min(workers or SCORING_WORKERS, SCORING_WORKERS))
+
+        size = len(snapshot["ids"])
+        slices = max(1, min(SCORING_CATALOG_SHARDS, size or 1))
+        bounds = np.linspace(0, size, slices + 1).astype(int)
+        row_ranges = [(int(lo), int(hi)) for lo, hi in zip(bounds, bounds[1:])]
+
+        profiles = [profile.to_dict() for profile in profiles]
+        shards = [
+            (profiles[offset : offset + SCORING_SHARD_SIZE], row_range)
+            for offset in range(0, len(profiles), SCORING_SHARD_SIZE)
+            for row_range in row_ranges
+        ]
+
+        results = [None] * len(shards)
+        pending = {}
+        for shard, (block, row_range) in enumerate(shards):
+            if len(pending) >= workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+            future = pool.submit(_score_shard, path, block, context, limit, row_range)
+            pending[future] = shard
+        for future, shard in pending.items():
+            results[shard] = future.result()
+
+        candidates: dict[int, list] = {profile["user_id"]: [] for profile in profiles}
+        timings = []
+        for shard, result in enumerate(results):
+            for user_id, rows in result.pop("ranked").items():
+                candidates[user_id].extend(rows)
+            timings.append({"shard": shard, **result})
+            logger.debug("Scoring shard %d done", shard, extra=result)
+
+        ranked = {}
+        for user_id, rows in candidates.items():
+            rows.sort(key=lambda item: -item[1]["utility_score"])
+            ranked[user_id] = [
+                ScoringService.ranked_entry(snapshot, row, scores)
+                for row, scores in rows[:limit]
+            ]
+        return ranked, timings
+
+    @classmethod
+    def export(cls, snapshot: dict) -> str:
+        """Write the snapshot columns as .npy files, once per catalog version"""
+        with cls._lock:
+            if cls._exported and cls._exported[0] == snapshot["version"]:
+                return cls._exported[1]
+
+            if cls._export_root is None:
+                cls._export_root = tempfile.mkdtemp(prefix="scoring-")
+            path = os.path.join(cls._export_root, f"v{snapshot['version']}")
+            os.makedirs(path, exist_ok=True)
+
+            for key in COLUMNS:
+                values = snapshot[key]
+                if not isinstance(values, np.ndarray) or values.dtype == object:
+                    # fixed width strings can be mapped, python objects can't
+                    values = np.array(
+                        ["" if value is None else str(value) for value in values],
+                        dtype=str,
+                    )
+                np.save(os.path.join(path, f"{key}.npy"), values)
+            with open(os.path.join(path, "meta.json"), "w") as f:
+                json.dump(
+                    {
+                        "version": snapshot["version"],
+                        "vocab": snapshot["vocab"],
+                        "columns": list(COLUMNS),
+                    },
+                    f,
+                )
+
+            if cls._exported:
+                shutil.rmtree(cls._exported[1], ignore_errors=True)
+            cls._exported = (snapshot["version"], path)
+            return path
+
+    @classmethod
+    def pool(cls) -> ProcessPoolExecutor:
+        """The one pool of SCORING_WORKERS processes every batch shares"""
+        with cls._lock:
+            if cls._pool is None:
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=SCORING_WORKERS,
+                    mp_context=multiprocessing.get_context(SCORING_START_METHOD),
+                )
+            return cls._pool
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.shutdown(wait=True)
+                cls._pool = None
+            if cls._export_root is not None:
+                shutil.rmtree(cls._export_root, ignore_errors=True)
+                cls._export_root = None
+                cls._exported = None
+
+
+atexit.register(ScoringExecutor.shutdown)
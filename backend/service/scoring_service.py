@@ -0,0 +1,323 @@
+from db.models import UserProfile
+from service.perfume_feature_store import (
+    PerfumeFeatureStore,
+    INTENSITY_LEVELS,
+    PROJECTION_LEVELS,
+)
+from service.candidate_index import CandidateIndex
+from service.simulation_service import (
+    SimulationService,
+    ADAPTATION,
+    TIME_GRID,
+    time_window,
+)
+import numpy as np
+import os
+
+
+SENSITIVITY_LEVELS = {"low": 0.0, "medium": 0.5, "high": 1.0}
+
+# users scored together in one matrix pass by rank_many
+SCORING_BLOCK_SIZE = int(os.getenv("SCORING_BLOCK_SIZE", "128"))
+
+SWEET_NOTES = ("vanilla", "caramel", "praline", "honey", "sugar", "tonka", "chocolate")
+
+
+def _norm(value) -> str:
+    return str(value).strip().lower() if value else ""
+
+
+def _split(value) -> list[str]:
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value).split(",")
+    return [_norm(item) for item in items if _norm(item) and _norm(item) != "none"]
+
+
+class ScoringService:
+    """
+    Local utility model from ai_architecture_design.md:
+    score every perfume by the mean of lambda * S(t) + Pself(t) over the
+    user's [time_window_start, time_window_end] window, all perfumes at once.
+    """
+
+    @classmethod
+    def tier_weights(cls, catalog: dict, profile: UserProfile) -> np.ndarray:
+        """Personal weights w_i for every tier of every perfume, in [-1, 1], (N, 3)"""
+        preferred = set(_split(profile.preferred_families))
+        disliked = set(_split(profile.disliked_families))
+        triggers = _split(profile.headache_triggers)
+        sweetness = SENSITIVITY_LEVELS.get(_norm(profile.sensitivity_sweetness), 0.5)
+        season = _norm(profile.seasonal_focus)
+        gender = _norm(profile.gender_presentation)
+        intensity = INTENSITY_LEVELS.get(_norm(profile.preferred_intensity), 1)
+
+        families = catalog["families"]
+        affinity = np.full(len(families), 0.2)
+        affinity[np.isin(families, list(preferred))] = 1.0
+        affinity[np.isin(families, list(disliked))] = -1.0
+
+        seasons = catalog["seasons"]
+        season_match = (seasons == season) | (seasons == "all-year") | (season == "all-year")
+        affinity += np.where(season_match, 0.2, -0.2)
+
+        genders = catalog["genders"]
+        gender_match = (genders == gender) | (genders == "unisex") | (gender == "unisex")
+        affinity += np.where(gender_match, 0.1, -0.5)
+
+        affinity -= 0.3 * np.abs(catalog["intensity"] - intensity)
+
+        weights = np.repeat(affinity[:, None], 3, axis=1)
+        tiers = (catalog["top_notes"], catalog["middle_notes"], catalog["base_notes"])
+        trigger_notes = PerfumeFeatureStore.vocab_mask(catalog, "notes", triggers)
+        sweet_notes = PerfumeFeatureStore.vocab_mask(catalog, "notes", SWEET_NOTES)
+        for tier, notes in enumerate(tiers):
+            weights[notes[:, trigger_notes].any(axis=1), tier] -= 1.0
+            weights[:, tier] -= 0.5 * sweetness * notes[:, sweet_notes].any(axis=1)
+
+        if _norm(profile.self_anosmia_musks) == "yes":
+            musk_notes = PerfumeFeatureStore.vocab_mask(catalog, "notes", ["musk"])
+            weights[catalog["base_notes"][:, musk_notes].any(axis=1), 2] *= 0.3
+
+        return np.clip(weights, -1.0, 1.0)
+
+    @classmethod
+    def score(
+        cls,
+        snapshot: dict,
+        profile: UserProfile,
+        context: dict | None = None,
+        rows: np.ndarray | None = None,
+    ) -> dict:
+        """
+        Score snapshot rows (all of them by default) for a single profile,
+        every value is an array aligned with rows
+        """
+        catalog = snapshot if rows is None else PerfumeFeatureStore.take(snapshot, rows)
+        env = SimulationService.environment(profile, context)
+        curves = SimulationService.curves(snapshot, env, rows)
+        sillage = SimulationService.sillage(catalog, curves, profile.number_of_sprays)
+        pleasantness = SimulationService.pleasantness(
+            cls.tier_weights(catalog, profile), curves
+        )
+        window = time_window(profile.time_window_start, profile.time_window_end)
+        lam = cls.sillage_weight(profile, env)
+
+        window_sillage = sillage[:, window].mean(axis=1)
+        window_pleasantness = pleasantness[:, window].mean(axis=1)
+        utility = lam * window_sillage + window_pleasantness
+
+        longevity = SimulationService.longevity(curves)
+        target = float(profile.longevity_target or 0)
+        if target > 0:
+            utility -= 0.5 * np.clip((target - longevity) / target, 0.0, 1.0)
+
+        goal = PROJECTION_LEVELS.get(_norm(profile.projection_goal))
+        if goal is not None:
+            utility -= 0.2 * np.abs(catalog["projection"] - goal)
+
+        return {
+            "predicted_longevity": np.minimum(longevity, TIME_GRID[-1]),
+            "predicted_projection": 1.0 + 9.0 * np.clip(sillage[:, window][:, 0], 0.0, 1.0),
+            "predicted_sillage": 1.0 + 9.0 * np.clip(window_sillage, 0.0, 1.0),
+            "predicted_pleasantness": 1.0
+            + 9.0 * np.clip((window_pleasantness + 1.0) / 2.0, 0.0, 1.0),
+            "utility_score": utility,
+        }
+
+    @classmethod
+    def sillage_weight(cls, profile: UserProfile, env: tuple) -> float:
+        """lambda, how much the trail counts against the wearer's own pleasure"""
+        # less room for a loud trail when the user can't stand it in the heat
+        lam = float(profile.projection_weight or 1.0)
+        if env[0] in ("26-32", ">32") and _norm(profile.sillage_tolerance_hot) == "low":
+            lam *= 0.5
+        return lam
+
+    @classmethod
+    def rank(
+        cls,
+        profile: UserProfile,
+        context: dict | None = None,
+        limit: int = 4,
+    ) -> list[dict]:
+        """
+        Return the best `limit` perfumes for the profile, highest utility first.
+        Perfumes failing a hard constraint are pruned before anything is scored
+        """
+        snapshot = PerfumeFeatureStore.snapshot()
+        return [
+            cls.ranked_entry(snapshot, row, scores)
+            for row, scores in cls.top_rows(snapshot, profile, context, limit)
+        ]
+
+    @classmethod
+    def top_rows(
+        cls,
+        snapshot: dict,
+        profile: UserProfile,
+        context: dict | None = None,
+        limit: int = 4,
+        row_range: tuple[int, int] | None = None,
+    ) -> list[tuple[int, dict]]:
+        """
+        (snapshot row, scores) of the best `limit` candidates, highest
+        utility first, optionally only among rows in [start, end)
+        """
+        rows = CandidateIndex.candidates(snapshot, profile)
+        if row_range is not None:
+            rows = rows[(rows >= row_range[0]) & (rows < row_range[1])]
+        if not len(rows):
+            return []
+
+        scores = cls.score(snapshot, profile, context, rows)
+        utility = scores["utility_score"]
+
+        limit = min(limit, len(utility))
+        top = np.argpartition(-utility, limit - 1)[:limit]
+        top = top[np.argsort(-utility[top])]
+
+        return [
+            (
+                int(rows[position]),
+                {field: float(values[position]) for field, values in scores.items()},
+            )
+            for position in top
+        ]
+
+    @classmethod
+    def rank_many(
+        cls,
+        profiles: list,
+        context: dict | None = None,
+        limit: int = 4,
+    ) -> dict:
+        """
+        rank() for many profiles, {user_id: ranked list}. Profiles sharing an
+        environment are scored together as one users x perfumes matrix
+        """
+        snapshot = PerfumeFeatureStore.snapshot()
+        groups = {}
+        for profile in profiles:
+            env = SimulationService.environment(profile, context)
+            groups.setdefault(env, []).append(profile)
+
+        ranked = {}
+        for env, group in groups.items():
+            for offset in range(0, len(group), SCORING_BLOCK_SIZE):
+                block = group[offset : offset + SCORING_BLOCK_SIZE]
+                scores = cls.score_many(snapshot, env, block)
+                for position, profile in enumerate(block):
+                    ranked[profile.user_id] = cls.top_entries(
+                        snapshot, scores, position, limit
+                    )
+        return ranked
+
+    @classmethod
+    def score_many(cls, snapshot: dict, env: tuple, profiles: list) -> dict:
+        """
+        score() for profiles sharing one environment, every value is a
+        (users, perfumes) array. The window means of the shared curves are
+        two matrix products against the stacked time windows; perfumes
+        failing a user's hard constraints get a utility of -inf
+        """
+        curves = SimulationService.curves(snapshot, env)
+        size = len(snapshot["ids"])
+
+        windows = np.stack(
+            [time_window(p.time_window_start, p.time_window_end) for p in profiles]
+        )
+        first = windows.argmax(axis=1)
+        means = (windows / windows.sum(axis=1, keepdims=True)).T  # (T, U)
+
+        # S(t) is the headspace scaled per perfume and by each user's dose
+        gain = snapshot["strength"] * (
+            0.6 + 0.3 * snapshot["projection"] + 0.1 * snapshot["sillage"]
+        )
+        dose = np.array(
+            [np.sqrt(np.clip(p.number_of_sprays or 3, 1, 10) / 3.0) for p in profiles]
+        )
+        projection = dose[:, None] * gain[None, :] * curves["headspace"][:, first].T
+        window_sillage = dose[:, None] * gain[None, :] * (curves["headspace"] @ means).T
+
+        # Pself(t) is linear in the tier weights, average each tier's share first
+        shares = curves["mass"] / np.maximum(curves["total"], 1e-9)[:, None, :]
+        shares = (shares * ADAPTATION[None, None, :]).reshape(size * 3, -1)
+        window_shares = (shares @ means).reshape(size, 3, len(profiles))
+        weights = np.stack([cls.tier_weights(snapshot, p) for p in profiles])
+        window_pleasantness = np.einsum("unk,nku->un", weights, window_shares)
+
+        lam = np.array([cls.sillage_weight(p, env) for p in profiles])
+        utility = lam[:, None] * window_sillage + window_pleasantness
+
+        longevity = SimulationService.longevity(curves)
+        target = np.array([float(p.longevity_target or 0) for p in profiles])
+        short = np.clip(
+            (target[:, None] - longevity[None, :]) / np.maximum(target, 1e-9)[:, None],
+            0.0,
+            1.0,
+        )
+        utility -= np.where(target[:, None] > 0, 0.5 * short, 0.0)
+
+        goal = np.array(
+            [
+                PROJECTION_LEVELS.get(_norm(p.projection_goal), np.nan)
+                for p in profiles
+            ]
+        )
+        miss = np.abs(snapshot["projection"][None, :] - goal[:, None])
+        utility -= np.where(np.isnan(miss), 0.0, 0.2 * miss)
+
+        allowed = np.zeros((len(profiles), size), dtype=bool)
+        for position, profile in enumerate(profiles):
+            allowed[position, CandidateIndex.candidates(snapshot, profile)] = True
+        utility[~allowed] = -np.inf
+
+        return {
+            "predicted_longevity": np.broadcast_to(
+                np.minimum(longevity, TIME_GRID[-1]), utility.shape
+            ),
+            "predicted_projection": 1.0 + 9.0 * np.clip(projection, 0.0, 1.0),
+            "predicted_sillage": 1.0 + 9.0 * np.clip(window_sillage, 0.0, 1.0),
+            "predicted_pleasantness": 1.0
+            + 9.0 * np.clip((window_pleasantness + 1.0) / 2.0, 0.0, 1.0),
+            "utility_score": utility,
+        }
+
+    @classmethod
+    def top_entries(
+        cls, snapshot: dict, scores: dict, position: int, limit: int = 4
+    ) -> list[dict]:
+        """Ranked list of one row of a score_many result, highest utility first"""
+        utility = scores["utility_score"][position]
+        rows = np.flatnonzero(np.isfinite(utility))
+        if not len(rows):
+            return []
+
+        limit = min(limit, len(rows))
+        top = rows[np.argpartition(-utility[rows], limit - 1)[:limit]]
+        top = top[np.argsort(-utility[top])]
+        return [
+            cls.ranked_entry(
+                snapshot,
+                int(row),
+                {field: float(values[position, row]) for field, values in scores.items()},
+            )
+            for row in top
+        ]
+
+    @classmethod
+    def ranked_entry(cls, snapshot: dict, row: int, scores: dict) -> dict:
+        price = snapshot["price"][row]
+        return {
+            "perfume_id": int(snapshot["ids"][row]),
+            "perfume": snapshot["names"][row],
+            "brand": snapshot["brands"][row],
+            "fragrance_family": str(snapshot["families"][row]),
+            "image_url": snapshot["image_urls"][row],
+            "price": None if np.isnan(price) else float(price),
+            **{field: round(value, 3) for field, value in scores.items()},
+        }
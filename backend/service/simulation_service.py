@@ -0,0 +1,211 @@
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+import os
+import threading
+
+
+# shared time grid (hours) used for every S(t) / Pself(t) curve
+TIME_GRID = np.linspace(0.0, 24.0, 97)
+TIME_GRID.setflags(write=False)
+
+# lifetime of each note tier as a fraction of the perfume's longevity_hours
+TIER_LIFETIME = np.array([0.15, 0.5, 1.0])  # top, middle, base
+# prior mass share of each tier before note counts are taken into account
+TIER_PRIOR = np.array([0.25, 0.35, 0.4])
+# how strongly each tier diffuses away from skin (volatile top notes travel further)
+TIER_DIFFUSIVITY = np.array([1.0, 0.7, 0.45])
+# a tier is considered "gone" once 10% of its mass remains
+DECAY_THRESHOLD = 0.1
+# olfactory adaptation: perceived pleasantness fades by up to 30% while worn
+ADAPTATION = 1.0 - 0.3 * (1.0 - np.exp(-TIME_GRID / 2.0))
+
+# questionnaire buckets (same labels as UserProfile) and the value simulated for each
+TEMPERATURE_BUCKETS = {"<15": 10.0, "15-25": 20.0, "26-32": 29.0, ">32": 35.0}
+HUMIDITY_BUCKETS = {"<30": 20.0, "30-60": 45.0, ">60": 75.0}
+
+AIRFLOW_RATE = {"still": 0.85, "normal": 1.0, "breezy": 1.3}
+SKIN_TYPE_RATE = {"dry": 1.25, "balanced": 1.0, "oily": 0.8}
+SKIN_TEMPERATURE_RATE = {"cool": 0.9, "neutral": 1.0, "warm": 1.15}
+SPRAY_LOCATION_RATE = {"skin only": 1.0, "mix": 0.92, "clothes only": 0.85}
+
+CACHE_SIZE = int(os.getenv("SIMULATION_CACHE_SIZE", "16"))
+
+
+def _norm(value) -> str:
+    return str(value).strip().lower() if value else ""
+
+
+def _label(value, buckets: dict, default: str) -> str:
+    key = _norm(value).replace("°c", "").replace("%", "").replace(" ", "")
+    return key if key in buckets else default
+
+
+def temperature_bucket(celsius: float) -> str:
+    if celsius < 15:
+        return "<15"
+    if celsius <= 25:
+        return "15-25"
+    if celsius <= 32:
+        return "26-32"
+    return ">32"
+
+
+def humidity_bucket(percent: float) -> str:
+    if percent < 30:
+        return "<30"
+    if percent <= 60:
+        return "30-60"
+    return ">60"
+
+
+@lru_cache(maxsize=256)
+def time_window(start: float, end: float) -> np.ndarray:
+    """Boolean mask of TIME_GRID for [start, end], at least one hour wide"""
+    start = float(np.clip(start or 0, 0, TIME_GRID[-1]))
+    end = float(np.clip(end or 0, 0, TIME_GRID[-1]))
+    if end <= start:
+        end = min(start + 1.0, TIME_GRID[-1])
+        start = min(start, end - 1.0)
+    window = (TIME_GRID >= start) & (TIME_GRID <= end)
+    window.setflags(write=False)
+    return window
+
+
+class SimulationService:
+    """
+    Note evaporation model behind S(t) and Pself(t).
+
+    Environments are bucketed the same way the questionnaire buckets them, so
+    there are only a few hundred distinct ones. The per-tier mass curves of the
+    whole catalog are memoized per environment in a bounded LRU and tied to
+    the feature store version, so a catalog write never serves stale curves.
+    """
+
+    _lock = threading.Lock()
+    _cache: OrderedDict = OrderedDict()
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def environment(cls, profile, context: dict | None = None) -> tuple:
+        """
+        Bucketed environment key:
+        (temperature, humidity, airflow, skin_type, skin_temperature, spray_location)
+        """
+        context = context or {}
+        if context.get("temperature") is not None:
+            temperature = temperature_bucket(float(context["temperature"]))
+        else:
+            temperature = _label(profile.avg_temperature, TEMPERATURE_BUCKETS, "15-25")
+        if context.get("humidity") is not None:
+            humidity = humidity_bucket(float(context["humidity"]))
+        else:
+            humidity = _label(profile.avg_humidity, HUMIDITY_BUCKETS, "30-60")
+
+        return (
+            temperature,
+            humidity,
+            _norm(profile.airflow) or "normal",
+            _norm(profile.skin_type) or "balanced",
+            _norm(profile.skin_temperature) or "neutral",
+            _norm(profile.spray_location) or "skin only",
+        )
+
+    @classmethod
+    def rate_multiplier(cls, env: tuple) -> float:
+        """How much faster than neutral conditions the notes evaporate"""
+        temperature, humidity, airflow, skin_type, skin_temperature, location = env
+        temperature_rate = 2.0 ** ((TEMPERATURE_BUCKETS[temperature] - 20.0) / 10.0)
+        humidity_rate = 1.15 - 0.3 * HUMIDITY_BUCKETS[humidity] / 100.0
+        return float(
+            temperature_rate
+            * humidity_rate
+            * AIRFLOW_RATE.get(airflow, 1.0)
+            * SKIN_TYPE_RATE.get(skin_type, 1.0)
+            * SKIN_TEMPERATURE_RATE.get(skin_temperature, 1.0)
+            * SPRAY_LOCATION_RATE.get(location, 1.0)
+        )
+
+    @classmethod
+    def curves(cls, catalog: dict, env: tuple, rows: np.ndarray | None = None) -> dict:
+        """
+        Evaporation curves of every perfume in the catalog for one environment:
+        mass (N, 3, T) remaining per tier, headspace (N, T), total (N, T), rates (N, 3).
+        With rows, only those snapshot rows are returned (sliced from the cache)
+        """
+        key = (catalog["version"],) + env
+        with cls._lock:
+            curves = cls._cache.get(key)
+            if curves is not None:
+                cls._cache.move_to_end(key)
+                cls.hits += 1
+            else:
+                cls.misses += 1
+
+        if curves is None:
+            curves = cls.simulate(catalog, env)
+            with cls._lock:
+                cls._cache[key] = curves
+                cls._cache.move_to_end(key)
+                while len(cls._cache) > CACHE_SIZE:
+                    cls._cache.popitem(last=False)
+
+        if rows is None:
+            return curves
+        return {name: value[rows] for name, value in curves.items()}
+
+    @classmethod
+    def simulate(cls, catalog: dict, env: tuple) -> dict:
+        """Evaporate top/middle/base tiers over TIME_GRID, uncached"""
+        shares = TIER_PRIOR * (catalog["note_counts"] + 1.0)
+        shares = shares / shares.sum(axis=1, keepdims=True)
+
+        lifetimes = catalog["longevity"][:, None] * TIER_LIFETIME[None, :]
+        rates = np.log(1.0 / DECAY_THRESHOLD) / lifetimes * cls.rate_multiplier(env)
+
+        mass = shares[:, :, None] * np.exp(-rates[:, :, None] * TIME_GRID[None, None, :])
+        mass = mass.astype(np.float32)
+        curves = {
+            "mass": mass,
+            "headspace": np.einsum("k,nkt->nt", TIER_DIFFUSIVITY.astype(np.float32), mass),
+            "total": mass.sum(axis=1),
+            "rates": rates,
+        }
+        for value in curves.values():
+            value.setflags(write=False)
+        return curves
+
+    @classmethod
+    def sillage(cls, catalog: dict, curves: dict, sprays: int) -> np.ndarray:
+        """S(t): diffusivity weighted headspace scaled by dose and projection, (N, T)"""
+        dose = catalog["strength"] * np.sqrt(np.clip(sprays or 3, 1, 10) / 3.0)
+        gain = 0.6 + 0.3 * catalog["projection"] + 0.1 * catalog["sillage"]
+        return (dose * gain)[:, None] * curves["headspace"]
+
+    @classmethod
+    def pleasantness(cls, weights: np.ndarray, curves: dict) -> np.ndarray:
+        """Pself(t): composition weighted preference damped by adaptation, (N, T)"""
+        preference = np.einsum("nk,nkt->nt", weights, curves["mass"])
+        preference /= np.maximum(curves["total"], 1e-9)
+        return preference * ADAPTATION[None, :]
+
+    @classmethod
+    def longevity(cls, curves: dict) -> np.ndarray:
+        """Hours until the base tier drops under DECAY_THRESHOLD, (N,)"""
+        return np.log(1.0 / DECAY_THRESHOLD) / curves["rates"][:, 2]
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "size": len(cls._cache),
+                "max_size": CACHE_SIZE,
+                "hits": cls.hits,
+                "misses": cls.misses,
+            }
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._lock:
+            cls._cache.clear()
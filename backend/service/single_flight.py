@@ -0,0 +1,36 @@
+from typing import Any, Awaitable, Callable, Hashable
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key: the first caller runs the
+    work, everyone arriving while it is in flight awaits the same result.
+    Nothing is kept once the call finishes, this is not a cache.
+
+    Callers share one task and await it through asyncio.shield, so a
+    caller that is cancelled (client disconnect) never cancels the others
+    nor the work itself: side effects belong in the factory.
+    """
+
+    _tasks: dict[Hashable, asyncio.Task] = {}
+    stats = {"leaders": 0, "coalesced": 0}
+
+    @classmethod
+    async def run(cls, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = cls._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            cls._tasks[key] = task
+            task.add_done_callback(lambda _: cls._tasks.pop(key, None))
+            cls.stats["leaders"] += 1
+        else:
+            cls.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        return {
+            **cls.stats,
+            "in_flight": len(cls._tasks),
+        }
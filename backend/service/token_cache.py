@@ -0,0 +1,213 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from db.core import get_session
+from db.models import AuthToken
+import hashlib
+import jwt
+import math
+import os
+import threading
+import time
+
+
+# lifetime of the signed JWT, the auth_tokens row lives longer (expires_at)
+ACCESS_TOKEN_MINUTES = 30
+
+VERIFY_CACHE_SIZE = int(os.getenv("JWT_VERIFY_CACHE_SIZE", "10000"))
+VERIFY_CACHE_TTL_SECONDS = float(os.getenv("JWT_VERIFY_CACHE_TTL_SECONDS", "300"))
+# expected revoked tokens alive at once and the bloom filter's false positive rate
+REVOCATION_CAPACITY = int(os.getenv("JWT_REVOCATION_CAPACITY", "100000"))
+REVOCATION_FALSE_POSITIVE_RATE = float(os.getenv("JWT_REVOCATION_FP_RATE", "0.001"))
+
+
+class BloomFilter:
+    """Fixed size bloom filter over strings, k bit positions from one sha256"""
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.sha256(value.encode()).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:16], "little") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevokedTokens:
+    """
+    Tokens logged out before they expired, kept in memory so a request is
+    checked without a query. A bloom filter answers "not revoked" for almost
+    every token, the exact set behind it settles the rest. Entries are kept
+    until the token's exp, past that the signature check rejects it anyway.
+
+    Hydrated from auth_tokens.is_deleted by load() at startup and updated by
+    add() on logout. Each worker process holds its own copy, a logout served
+    by another worker is seen here after the next load().
+    """
+
+    _lock = threading.Lock()
+    _tokens: dict[str, float] = {}  # token -> exp timestamp
+    _bloom = BloomFilter(REVOCATION_CAPACITY, REVOCATION_FALSE_POSITIVE_RATE)
+    stats = {"checks": 0, "bloom_hits": 0, "revoked_hits": 0, "rebuilds": 0}
+
+    @classmethod
+    def load(cls) -> int:
+        """Read the deleted, unexpired tokens, returns how many are revoked"""
+        with get_session() as db:
+            rows = (
+                db.query(AuthToken.token, AuthToken.expires_at)
+                .filter(AuthToken.is_deleted.is_(True))
+                .filter(
+                    (AuthToken.expires_at.is_(None))
+                    | (AuthToken.expires_at > datetime.now(timezone.utc))
+                )
+                .all()
+            )
+
+        tokens = {}
+        for token, expires_at in rows:
+            expires = token_expiry(token, expires_at)
+            if expires > time.time():
+                tokens[token] = expires
+        with cls._lock:
+            cls._tokens = tokens
+            cls._rebuild()
+            return len(cls._tokens)
+
+    @classmethod
+    def add(cls, token: str, expires_at: datetime | None = None) -> None:
+        expires = token_expiry(token, expires_at)
+        with cls._lock:
+            cls._tokens[token] = expires
+            cls._bloom.add(token)
+            if len(cls._tokens) > REVOCATION_CAPACITY:
+                cls._rebuild()
+
+    @classmethod
+    def contains(cls, token: str) -> bool:
+        with cls._lock:
+            cls.stats["checks"] += 1
+            if token not in cls._bloom:
+                return False
+            cls.stats["bloom_hits"] += 1
+            if token in cls._tokens:
+                cls.stats["revoked_hits"] += 1
+                return True
+            return False
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._lock:
+            return {
+                **cls.stats,
+                "size": len(cls._tokens),
+                "capacity": REVOCATION_CAPACITY,
+                "bloom_bits": cls._bloom.size,
+                "bloom_hashes": cls._bloom.hashes,
+            }
+
+    @classmethod
+    def _rebuild(cls) -> None:
+        # bloom filters cannot forget, drop expired tokens and start over
+        now = time.time()
+        cls._tokens = {token: exp for token, exp in cls._tokens.items() if exp > now}
+        cls._bloom = BloomFilter(
+            max(REVOCATION_CAPACITY, len(cls._tokens) * 2),
+            REVOCATION_FALSE_POSITIVE_RATE,
+        )
+        for token in cls._tokens:
+            cls._bloom.add(token)
+        cls.stats["rebuilds"] += 1
+
+
+class VerifiedTokenCache:
+    """
+    LRU of tokens whose signature and exp were already checked, so a repeat
+    request skips jwt.decode. An entry lives for VERIFY_CACHE_TTL_SECONDS but
+    never past the token's own exp.
+    """
+
+    _lock = threading.Lock()
+    _entries: OrderedDict = OrderedDict()  # token -> (expires_at, payload)
+    stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @classmethod
+    def get(cls, token: str) -> dict | None:
+        with cls._lock:
+            entry = cls._entries.get(token)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > time.time():
+                    cls._entries.move_to_end(token)
+                    cls.stats["hits"] += 1
+                    return payload
+                del cls._entries[token]
+                cls.stats["expired"] += 1
+            cls.stats["misses"] += 1
+            return None
+
+    @classmethod
+    def set(cls, token: str, payload: dict) -> None:
+        expires_at = time.time() + VERIFY_CACHE_TTL_SECONDS
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, float(payload["exp"]))
+        with cls._lock:
+            cls._entries[token] = (expires_at, payload)
+            cls._entries.move_to_end(token)
+            while len(cls._entries) > VERIFY_CACHE_SIZE:
+                cls._entries.popitem(last=False)
+                cls.stats["evictions"] += 1
+
+    @classmethod
+    def discard(cls, token: str) -> None:
+        with cls._lock:
+            cls._entries.pop(token, None)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._lock:
+            lookups = cls.stats["hits"] + cls.stats["misses"]
+            return {
+                **cls.stats,
+                "size": len(cls._entries),
+                "max_size": VERIFY_CACHE_SIZE,
+                "ttl_seconds": VERIFY_CACHE_TTL_SECONDS,
+                "hit_ratio": round(cls.stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+def token_expiry(token: str, expires_at: datetime | None = None) -> float:
+    """The token's exp claim as a timestamp, the row's expires_at when unreadable"""
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        if exp is not None:
+            return float(exp)
+    except jwt.PyJWTError:
+        pass
+    if expires_at is not None:
+        # expires_at is written in UTC, sqlite hands it back naive
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at.timestamp()
+    return time.time() + VERIFY_CACHE_TTL_SECONDS
@@ -0,0 +1,156 @@
+from db.core import get_session
+from db.models import AuthToken
+from service.token_cache import ACCESS_TOKEN_MINUTES
+from service.metrics import Metrics
+from sqlalchemy import or_
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+import time
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+TOKEN_REAPER_INTERVAL_SECONDS = float(os.getenv("TOKEN_REAPER_INTERVAL_SECONDS", "600"))
+TOKEN_REAPER_BATCH_SIZE = int(os.getenv("TOKEN_REAPER_BATCH_SIZE", "500"))
+# pause between batches so the deletes never hold the write lock for long
+TOKEN_REAPER_BATCH_PAUSE_SECONDS = float(os.getenv("TOKEN_REAPER_BATCH_PAUSE_SECONDS", "0.2"))
+# per reason and run, whatever is left waits for the next run
+TOKEN_REAPER_MAX_BATCHES = int(os.getenv("TOKEN_REAPER_MAX_BATCHES", "100"))
+
+
+class TokenReaper:
+    """
+    Background thread deleting auth_tokens rows nobody can use any more:
+    rows past expires_at, and logged out (is_deleted) rows once their JWT
+    has expired too, until then the row is what keeps the token revoked
+    across restarts (see service/token_cache.py).
+
+    Rows go in batches of TOKEN_REAPER_BATCH_SIZE ids, each in its own short
+    transaction with a pause in between, so logins keep getting the write
+    lock while a large backlog is cleared.
+    """
+
+    _worker: threading.Thread | None = None
+    _stopping = threading.Event()
+    _lock = threading.Lock()
+    stats = {
+        "runs": 0,
+        "failed": 0,
+        "reaped_expired": 0,
+        "reaped_revoked": 0,
+        "last_run_at": None,
+        "last_run_seconds": 0.0,
+    }
+
+    @classmethod
+    def start(cls) -> None:
+        if TOKEN_REAPER_INTERVAL_SECONDS <= 0 or cls.running():
+            return
+        cls._stopping.clear()
+        cls._worker = threading.Thread(target=cls._run, name="token-reaper", daemon=True)
+        cls._worker.start()
+
+    @classmethod
+    def stop(cls, timeout: float = 10) -> None:
+        if cls._worker is None:
+            return
+        cls._stopping.set()
+        cls._worker.join(timeout)
+        cls._worker = None
+
+    @classmethod
+    def running(cls) -> bool:
+        return cls._worker is not None and cls._worker.is_alive()
+
+    @classmethod
+    def _run(cls) -> None:
+        while not cls._stopping.is_set():
+            try:
+                cls.reap()
+            except Exception:
+                logger.exception("Token reaper run failed")
+                with cls._lock:
+                    cls.stats["failed"] += 1
+            cls._stopping.wait(TOKEN_REAPER_INTERVAL_SECONDS)
+
+    @classmethod
+    def reap(cls) -> dict:
+        """One pass over the table, returns the rows deleted per reason"""
+        start = time.perf_counter()
+        # expires_at is written in UTC, updated_at in local time like created_at
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        revoked_before = datetime.now() - timedelta(minutes=ACCESS_TOKEN_MINUTES)
+
+        reaped = {
+            "expired": cls._reap("expired", AuthToken.expires_at < now),
+            "revoked": cls._reap(
+                "revoked",
+                AuthToken.is_deleted.is_(True)
+                & or_(
+                    AuthToken.updated_at.is_(None),
+                    AuthToken.updated_at < revoked_before,
+                ),
+            ),
+        }
+
+        seconds = time.perf_counter() - start
+        with cls._lock:
+            cls.stats["runs"] += 1
+            cls.stats["reaped_expired"] += reaped["expired"]
+            cls.stats["reaped_revoked"] += reaped["revoked"]
+            cls.stats["last_run_at"] = datetime.now().isoformat(timespec="seconds")
+            cls.stats["last_run_seconds"] = round(seconds, 4)
+        if reaped["expired"] or reaped["revoked"]:
+            logger.info("Reaped auth tokens", extra={**reaped, "seconds": round(seconds, 4)})
+        return reaped
+
+    @classmethod
+    def _reap(cls, reason: str, condition) -> int:
+        total = 0
+        for _ in range(TOKEN_REAPER_MAX_BATCHES):
+            start = time.perf_counter()
+            with get_session() as db:
+                ids = [
+                    row[0]
+                    for row in db.query(AuthToken.id)
+                    .filter(condition)
+                    .limit(TOKEN_REAPER_BATCH_SIZE)
+                    .all()
+                ]
+                if not ids:
+                    break
+                db.query(AuthToken).filter(AuthToken.id.in_(ids)).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+
+            total += len(ids)
+            Metrics.inc(
+                "auth_tokens_reaped_total",
+                "auth_tokens rows deleted by the token reaper",
+                {"reason": reason},
+                len(ids),
+            )
+            Metrics.observe(
+                "auth_token_reap_batch_seconds",
+                "Time to delete one batch of auth_tokens rows",
+                time.perf_counter() - start,
+            )
+            if len(ids) < TOKEN_REAPER_BATCH_SIZE or cls._stopping.wait(
+                TOKEN_REAPER_BATCH_PAUSE_SECONDS
+            ):
+                break
+        return total
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._lock:
+            return {
+                **cls.stats,
+                "running": cls.running(),
+                "interval_seconds": TOKEN_REAPER_INTERVAL_SECONDS,
+                "batch_size": TOKEN_REAPER_BATCH_SIZE,
+            }
@@ -1,17 +1,28 @@
-from db.core import get_session
+from db.core import get_session, use_session, commit_or_flush
+from db.async_core import use_async_session, acommit_or_flush
 from db.models import UserProfile
 from schema.user_profile_schema import UserProfileSchema
 from schema.response_schema import APIResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app_logging import get_logger, sampled
+
+
+logger = get_logger(__name__)
 
 
 class UserProfileService:
 
     @classmethod
-    def create_user_profile(cls, profile: UserProfileSchema) -> APIResponse:
-        with get_session() as session:
+    def create_user_profile(
+        cls, profile: UserProfileSchema, session: Session | None = None
+    ) -> APIResponse:
+        with use_session(session) as session:
 
-            print("-----------------------------------")
-            print("got this profile", profile)
+            if sampled(logger):
+                logger.debug("Creating profile", extra={"profile": profile})
 
             user_id = (
                 profile["user_id"] if isinstance(profile, dict) else profile.user_id
@@ -30,21 +41,28 @@ class UserProfileService:
             else:
 
                 try:
-                    print("trying to create profile...............")
                     if isinstance(profile, dict):
 
                         new_profile = UserProfile(**profile)
                     else:
                         new_profile = UserProfile(**profile.dict())
                     session.add(new_profile)
-                    session.commit()
+                    commit_or_flush(session)
 
-                    print("user profile created successfully")
+                    logger.info("User profile created", extra={"user_id": user_id})
                     return APIResponse(
                         success=True, message="User profile created successfully"
                     )
+                except IntegrityError:
+                    # a concurrent request created the profile after our check
+                    session.rollback()
+                    return APIResponse(
+                        success=False,
+                        message=f"User with id: {user_id} already has a profile",
+                    )
                 except Exception as e:
-                    print("Failed to create user profile", e)
+                    logger.exception("Failed to create user profile")
+                    session.rollback()
                     return APIResponse(
                         success=False, message="Failed to create profile"
                     )
@@ -77,7 +95,7 @@ class UserProfileService:
                 db_profile.airflow = profile.airflow
                 db_profile.preferred_families = profile.preferred_families
                 db_profile.disliked_families = profile.disliked_families
-                db_profile.preferred_intensity = profile.preferred_instensity
+                db_profile.preferred_intensity = profile.preferred_intensity
                 db_profile.longevity_target = profile.longevity_target
                 db_profile.gender_presentation = profile.gender_presentation
                 db_profile.preferred_character = profile.preferred_character
@@ -146,8 +164,10 @@ class UserProfileService:
             return APIResponse(success=True, message="All good", data=[db_profiles])
 
     @classmethod
-    def get_user_profile_user_id(cls, user_id: int) -> APIResponse:
-        with get_session() as session:
+    def get_user_profile_user_id(
+        cls, user_id: int, session: Session | None = None
+    ) -> APIResponse:
+        with use_session(session) as session:
             profile = session.query(UserProfile).filter_by(user_id=user_id).first()
 
             if not profile:
@@ -158,3 +178,61 @@ class UserProfileService:
             return APIResponse(
                 success=True, message="Found user profile", data=[profile]
             )
+
+    @classmethod
+    async def acreate_user_profile(
+        cls, profile: UserProfileSchema | dict, session: AsyncSession | None = None
+    ) -> APIResponse:
+        async with use_async_session(session) as session:
+            user_id = (
+                profile["user_id"] if isinstance(profile, dict) else profile.user_id
+            )
+            db_user_profile = await session.scalar(
+                select(UserProfile).filter_by(user_id=user_id).limit(1)
+            )
+
+            if db_user_profile:
+                return APIResponse(
+                    success=False,
+                    message=f"User with id: {user_id} already has a profile",
+                )
+
+            try:
+                if isinstance(profile, dict):
+                    new_profile = UserProfile(**profile)
+                else:
+                    new_profile = UserProfile(**profile.dict())
+                session.add(new_profile)
+                await acommit_or_flush(session)
+                return APIResponse(
+                    success=True, message="User profile created successfully"
+                )
+            except IntegrityError:
+                # a concurrent request created the profile after our check
+                await session.rollback()
+                return APIResponse(
+                    success=False,
+                    message=f"User with id: {user_id} already has a profile",
+                )
+            except Exception as e:
+                logger.exception("Failed to create user profile")
+                await session.rollback()
+                return APIResponse(success=False, message="Failed to create profile")
+
+    @classmethod
+    async def aget_user_profile_user_id(
+        cls, user_id: int, session: AsyncSession | None = None
+    ) -> APIResponse:
+        async with use_async_session(session) as session:
+            profile = await session.scalar(
+                select(UserProfile).filter_by(user_id=user_id).limit(1)
+            )
+
+            if not profile:
+                return APIResponse(
+                    success=False, message="Cannot find user profile for given user"
+                )
+
+            return APIResponse(
+                success=True, message="Found user profile", data=[profile]
+            )
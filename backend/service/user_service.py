@@ -1,9 +1,16 @@
 from db.core import get_session
+from db.async_core import get_async_session
 from db.models import User
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from schema.response_schema import APIResponse
+from service.pagination import page_response, apage_response, DEFAULT_PAGE_SIZE
 from schema.user_schema import UserSchema
 from service.auth_service import HashService
+from service.hash_executor import HasherBusy, busy_error
+from app_logging import get_logger
+
+
+logger = get_logger(__name__)
 
 
 class UserService:
@@ -36,6 +43,8 @@ class UserService:
                         success=True,
                         message=f"User with username: {user.username} created successfully",
                     )
+                except HasherBusy as e:
+                    raise busy_error(e) from e
                 except:
                     return APIResponse(
                         status_code=500, success=False, message="Failed to create user"
@@ -55,9 +64,14 @@ class UserService:
                     message=f"Cannot find user with id: {user_id}",
                 )
             else:
+                try:
+                    password = HashService.hash_password(user.password)
+                except HasherBusy as e:
+                    raise busy_error(e) from e
+
                 db_user.username = user.username
                 db_user.email = user.email
-                db_user.password = HashService.hash_password(user.password)
+                db_user.password = password
 
                 session.add(db_user)
                 session.commit()
@@ -89,7 +103,7 @@ class UserService:
                     )
 
                 except Exception as e:
-                    print("Something went wrong", e)
+                    logger.exception("Failed to delete user")
                     return APIResponse(
                         status_code=500,
                         success=False,
@@ -112,12 +126,115 @@ class UserService:
                 return APIResponse(success=True, message="Found user", data=[db_user])
 
     @classmethod
-    def get_all_users(cls) -> APIResponse:
+    def get_all_users(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
         with get_session() as session:
-            db_users = session.query(User).all()
-            if not db_users:
-                db_users = []
-            return APIResponse(success=True, message="All good", data=db_users)
+            return page_response(session.query(User), User, cursor, limit)
+
+    # async variants, bcrypt still runs in the threadpool so it does not block the loop
+
+    @classmethod
+    async def acreate_user(cls, user: UserSchema) -> APIResponse:
+        async with get_async_session() as session:
+            db_user = await session.scalar(
+                select(User)
+                .filter(or_(User.email == user.email, User.username == user.username))
+                .limit(1)
+            )
+
+            if db_user:
+                return APIResponse(
+                    success=False,
+                    message="User with same email or username already exists",
+                )
+
+            try:
+                new_user = User(**user.dict())
+                new_user.password = await HashService.ahash_password(new_user.password)
+                session.add(new_user)
+                await session.commit()
+                return APIResponse(
+                    success=True,
+                    message=f"User with username: {user.username} created successfully",
+                )
+            except HasherBusy as e:
+                raise busy_error(e) from e
+            except Exception as e:
+                logger.exception("Failed to create user")
+                return APIResponse(
+                    status_code=500, success=False, message="Failed to create user"
+                )
+
+    @classmethod
+    async def aupdate_user(cls, user_id: int, user: UserSchema) -> APIResponse:
+        async with get_async_session() as session:
+            db_user = await session.get(User, user_id)
+
+            if not db_user:
+                return APIResponse(
+                    status_code=404,
+                    success=False,
+                    message=f"Cannot find user with id: {user_id}",
+                )
+
+            try:
+                password = await HashService.ahash_password(user.password)
+            except HasherBusy as e:
+                raise busy_error(e) from e
+
+            db_user.username = user.username
+            db_user.email = user.email
+            db_user.password = password
+            await session.commit()
+            return APIResponse(success=True, message=f"User detail updated successfully")
+
+    @classmethod
+    async def adelete_user(cls, user_id: int) -> APIResponse:
+        async with get_async_session() as session:
+            db_user = await session.get(User, user_id)
+
+            if not db_user:
+                return APIResponse(
+                    status_code=404,
+                    success=False,
+                    message=f"Cannot find user with id: {user_id}",
+                )
+
+            try:
+                await session.delete(db_user)
+                await session.commit()
+                return APIResponse(
+                    success=True,
+                    message=f"User with id: {user_id} deleted successfully",
+                )
+            except Exception as e:
+                logger.exception("Failed to delete user")
+                return APIResponse(
+                    status_code=500,
+                    success=False,
+                    message=f"Failed to delete user with id: {user_id}",
+                )
+
+    @classmethod
+    async def aget_user_by_id(cls, user_id: int) -> APIResponse:
+        async with get_async_session() as session:
+            db_user = await session.get(User, user_id)
+
+            if not db_user:
+                return APIResponse(
+                    status_code=404,
+                    success=False,
+                    message=f"Cannot find user with id: {user_id}",
+                )
+            return APIResponse(success=True, message="Found user", data=[db_user])
+
+    @classmethod
+    async def aget_all_users(
+        cls, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> APIResponse:
+        async with get_async_session() as session:
+            return await apage_response(session, User, cursor, limit)
 
     @classmethod
     def delete_users_all(cls) -> APIResponse:
@@ -127,7 +244,7 @@ class UserService:
                 session.commit()
                 return APIResponse(success=True, message="Delete all users <:)")
             except Exception as e:
-                print("Something went wrong:", e)
+                logger.exception("Failed to delete all users")
                 return APIResponse(
                     success=False, message="Failed to wipe out all users. Thank God!"
                 )